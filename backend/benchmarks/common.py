@@ -0,0 +1,79 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run from the backend directory, e.g.::
+
+    python -m benchmarks.login_contention
+
+They drive the ASGI app in-process over httpx, against mongomock-motor by
+default or a real mongod when ``--mongo-url`` is given.
+"""
+import argparse
+import math
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+
+import server
+
+
+def add_database_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--mongo-url", help="use a real mongod instead of mongomock-motor")
+    parser.add_argument("--db-name", default="pet_adoption_bench")
+
+
+def use_database(args: argparse.Namespace):
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        server.use_database(AsyncIOMotorClient(args.mongo_url)[args.db_name])
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        server.use_database(AsyncMongoMockClient()[args.db_name])
+    return server.db
+
+
+def asgi_client() -> httpx.AsyncClient:
+    # Every benchmark request comes from one address; rate limits would only
+    # measure the limiter
+    server.RATE_LIMIT_ENABLED = False
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench")
+
+
+async def seed_pets(count: int):
+    pets = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Pet {i}",
+            "category": ["Dog", "Cat", "Bird"][i % 3],
+            "weight": 5.0 + i % 30,
+            "height": 20.0 + i % 50,
+            "breed": f"Breed {i % 12}",
+            "gender": "male" if i % 2 else "female",
+            "description": "Benchmark pet",
+            "available": True,
+            "created_at": datetime.utcnow(),
+        }
+        for i in range(count)
+    ]
+    if pets:
+        await server.db.pets.insert_many(pets)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
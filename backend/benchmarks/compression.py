@@ -0,0 +1,120 @@
+"""CPU cost versus bytes saved for gzip and brotli on real API payloads.
+
+Seeds pets, captures uncompressed ``/api/pets``, ``/api/admin/pets`` and
+``/api/orders`` bodies, then times each encoding and level on them. A second
+table shows request latency for the cached catalog, whose compressed bytes are
+reused, against the admin listing, which the middleware compresses on every
+request::
+
+    python -m benchmarks.compression --pets 2000
+"""
+import argparse
+import asyncio
+import time
+import zlib
+from typing import Callable, Dict, List, Tuple
+
+import server
+from benchmarks.common import add_database_args, asgi_client, seed_pets, summarize, use_database
+from compression import brotli, compress
+
+LEVELS: List[Tuple[str, int]] = [("gzip", 1), ("gzip", 6), ("gzip", 9)]
+if brotli is not None:
+    LEVELS += [("br", 1), ("br", 5), ("br", 11)]
+
+
+def time_per_call(fn: Callable[[], object], min_seconds: float = 0.2) -> float:
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def decompressor(encoding: str) -> Callable[[bytes], bytes]:
+    return brotli.decompress if encoding == "br" else (lambda data: zlib.decompress(data, 31))
+
+
+async def capture_payloads(client, admin: Dict[str, str]) -> Dict[str, bytes]:
+    identity = {"Accept-Encoding": "identity"}
+    payloads = {}
+    for limit in (20, 200):
+        payloads[f"/api/pets?limit={limit}"] = (await client.get("/api/pets", params={"limit": limit}, headers=identity)).content
+    payloads["/api/admin/pets"] = (await client.get("/api/admin/pets", headers={**admin, **identity})).content
+    payloads["/api/orders?limit=200"] = (
+        await client.get("/api/orders", params={"limit": 200}, headers={**admin, **identity})
+    ).content
+    return payloads
+
+
+async def seed_orders(count: int, user_id: str):
+    pets = await server.db.pets.find({}, {"_id": 0, "id": 1, "name": 1, "created_at": 1}).to_list(length=count)
+    await server.db.orders.insert_many([
+        {
+            "id": f"order-{i}",
+            "user_id": user_id,
+            "pet_id": pet["id"],
+            "pet_name": pet["name"],
+            "shipping_name": f"Customer {i}",
+            "shipping_address": f"{i} Benchmark Road, Springfield",
+            "shipping_phone": f"+1555{i:07d}",
+            "status": "pending",
+            "created_at": pet["created_at"],
+        }
+        for i, pet in enumerate(pets)
+    ])
+
+
+async def request_latency(client, path: str, headers: Dict[str, str], requests: int) -> dict:
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await client.get(path, headers=headers)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def main(args):
+    use_database(args)
+    await server.startup_event()
+    await seed_pets(args.pets)
+    async with asgi_client() as client:
+        login = await client.post("/api/auth/login", json={"email": "admin@petadoption.com", "password": "admin123"})
+        admin = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        await seed_orders(200, login.json()["user"]["id"])
+        payloads = await capture_payloads(client, admin)
+
+        print(f"{'payload':<24} {'encoding':<8} {'bytes':>9} {'ratio':>6} {'compress':>11} {'MB/s':>7} {'decompress':>11}")
+        for name, body in payloads.items():
+            print(f"{name:<24} {'identity':<8} {len(body):>9} {1.0:>6.2f}")
+            for encoding, level in LEVELS:
+                kwargs = {"gzip_level": level} if encoding == "gzip" else {"brotli_quality": level}
+                encoded = compress(body, encoding, **kwargs)
+                seconds = time_per_call(lambda: compress(body, encoding, **kwargs))
+                decode = decompressor(encoding)
+                decode_seconds = time_per_call(lambda: decode(encoded))
+                print(
+                    f"{'':<24} {f'{encoding}-{level}':<8} {len(encoded):>9} {len(body) / len(encoded):>6.2f} "
+                    f"{seconds * 1000:>9.3f}ms {len(body) / seconds / 1e6:>7.1f} {decode_seconds * 1000:>9.3f}ms"
+                )
+
+        print("\nper-request latency (compression level from the server's COMPRESSION_* settings):")
+        for label, path, headers in [
+            ("catalog, identity", "/api/pets?limit=200", {"Accept-Encoding": "identity"}),
+            ("catalog, br/gzip (cached)", "/api/pets?limit=200", {"Accept-Encoding": "br, gzip"}),
+            ("admin list, identity", "/api/admin/pets", {**admin, "Accept-Encoding": "identity"}),
+            ("admin list, br/gzip (per request)", "/api/admin/pets", {**admin, "Accept-Encoding": "br, gzip"}),
+        ]:
+            summary = await request_latency(client, path, headers, args.requests)
+            print(f"  {label:<36} p50={summary['p50_ms']}ms p99={summary['p99_ms']}ms")
+    await server.shutdown_event()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_database_args(parser)
+    parser.add_argument("--pets", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per latency row")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,321 @@
+"""Mixed-traffic load test with per-route latency percentiles.
+
+Concurrent virtual users each pick a scenario by weight and issue one request
+per step, as fast as responses come back. Pets, users and orders are created
+through the API first, so the same run works in-process (mongomock-motor by
+default, or ``--mongo-url``) and against a running server (``--base-url``)::
+
+    python -m benchmarks.load_test --duration 30 --concurrency 32 --output results/head.json
+    python -m benchmarks.load_test --mix browse=80,image=20 --compare results/head.json
+    python -m benchmarks.load_test --base-url http://localhost:8001
+
+Start a server under test with ``RATE_LIMIT_ENABLED=0``: all virtual users
+share one address and would otherwise be throttled.
+
+Results are written as JSON, tagged with the current git commit, and
+``--compare`` prints the change in throughput and percentiles against an
+earlier result file.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+import server
+from benchmarks.common import add_database_args, asgi_client, summarize, use_database
+
+SCENARIOS = {
+    "browse": "GET /api/pets",
+    "image": "GET /api/pets/{pet_id}/image",
+    "login": "POST /api/auth/login",
+    "order": "POST /api/orders",
+    "approve": "PUT /api/orders/{order_id}/status",
+}
+DEFAULT_MIX = "browse=60,image=25,login=5,order=7,approve=3"
+CATEGORIES = ["Dog", "Cat", "Bird"]
+PASSWORD = "bench-password"
+
+# 1x1 PNG; each pet gets a unique suffix so the blob store can't deduplicate
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg=="
+)
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for {name!r}: {weight!r}")
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix needs at least one positive weight")
+    return mix
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class World:
+    """Client-side view of the data the scenarios act on."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.run_id = uuid.uuid4().hex[:8]
+        self.pet_ids: List[str] = []
+        self.available: List[str] = []
+        self.users: List[Dict[str, str]] = []
+        self.pending_orders: List[str] = []
+        self.admin: Dict[str, str] = {}
+
+    def take(self, items: List[str]) -> Optional[str]:
+        if not items:
+            return None
+        index = self.rng.randrange(len(items))
+        items[index], items[-1] = items[-1], items[index]
+        return items.pop()
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> Dict[str, str]:
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def seed(client: httpx.AsyncClient, world: World, args):
+    world.admin = await login(client, args.admin_email, args.admin_password)
+    padding = os.urandom(max(0, args.image_kb * 1024 - len(PNG)))
+    semaphore = asyncio.Semaphore(8)
+
+    async def add_pet(i: int):
+        async with semaphore:
+            response = await client.post(
+                "/api/pets",
+                data={
+                    "name": f"Load Pet {i}",
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "weight": str(5 + i % 30),
+                    "height": str(20 + i % 50),
+                    "breed": f"Breed {i % 12}",
+                    "gender": "male" if i % 2 else "female",
+                    "description": "Load test pet",
+                },
+                files={"image": (f"pet{i}.png", PNG + padding + i.to_bytes(4, "big"), "image/png")},
+                headers=world.admin,
+            )
+            response.raise_for_status()
+            world.pet_ids.append(response.json()["id"])
+
+    async def add_user(i: int):
+        email = f"load-{world.run_id}-{i}@example.com"
+        async with semaphore:
+            response = await client.post(
+                "/api/auth/register", json={"email": email, "name": f"Load User {i}", "password": PASSWORD}
+            )
+            response.raise_for_status()
+            world.users.append({"email": email, **await login(client, email, PASSWORD)})
+
+    await asyncio.gather(*[add_pet(i) for i in range(args.pets)], *[add_user(i) for i in range(args.users)])
+    world.available = list(world.pet_ids)
+
+
+async def run_scenario(name: str, client: httpx.AsyncClient, world: World) -> Optional[int]:
+    """Issue one request for ``name``; returns the status, or None if there was nothing to act on."""
+    rng = world.rng
+    if name == "browse":
+        params = {"limit": 20}
+        if rng.random() < 0.5:
+            params["category"] = rng.choice(CATEGORIES)
+        return (await client.get("/api/pets", params=params)).status_code
+    if name == "image":
+        return (await client.get(f"/api/pets/{rng.choice(world.pet_ids)}/image")).status_code
+    if name == "login":
+        user = rng.choice(world.users)
+        response = await client.post("/api/auth/login", json={"email": user["email"], "password": PASSWORD})
+        return response.status_code
+    if name == "order":
+        pet_id = world.take(world.available)
+        if pet_id is None:
+            return None
+        user = rng.choice(world.users)
+        response = await client.post(
+            "/api/orders",
+            json={"pet_id": pet_id, "shipping_name": "Load", "shipping_address": "1 Test St", "shipping_phone": "555"},
+            headers={"Authorization": user["Authorization"]},
+        )
+        if response.status_code == 200:
+            world.pending_orders.append(response.json()["id"])
+        return response.status_code
+    if name == "approve":
+        order_id = world.take(world.pending_orders)
+        if order_id is None:
+            return None
+        # Reject half so their pets return to the catalog and orders keep flowing
+        status = "rejected" if rng.random() < 0.5 else "approved"
+        response = await client.put(f"/api/orders/{order_id}/status", json={"status": status}, headers=world.admin)
+        if response.status_code == 200 and status == "rejected":
+            world.available.append(response.json()["pet_id"])
+        return response.status_code
+    raise ValueError(name)
+
+
+async def drive(client: httpx.AsyncClient, world: World, args) -> Dict[str, dict]:
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    skipped = Counter()
+    start = time.perf_counter()
+    measure_from = start + args.warmup
+    deadline = measure_from + args.duration
+
+    async def virtual_user():
+        while True:
+            began = time.perf_counter()
+            if began >= deadline:
+                return
+            name = world.rng.choices(names, weights)[0]
+            status = await run_scenario(name, client, world)
+            if began < measure_from:
+                continue
+            if status is None:
+                skipped[name] += 1
+                continue
+            latencies[name].append(time.perf_counter() - began)
+            statuses[name][status] += 1
+
+    await asyncio.gather(*[virtual_user() for _ in range(args.concurrency)])
+
+    routes = {}
+    for name in names:
+        routes[name] = {
+            "route": SCENARIOS[name],
+            "throughput_rps": round(len(latencies[name]) / args.duration, 2),
+            **summarize(latencies[name]),
+            "statuses": {str(code): count for code, count in sorted(statuses[name].items())},
+            "skipped": skipped[name],
+        }
+    all_latencies = [sample for samples in latencies.values() for sample in samples]
+    routes["total"] = {
+        "route": "*",
+        "throughput_rps": round(len(all_latencies) / args.duration, 2),
+        **summarize(all_latencies),
+        "statuses": {},
+        "skipped": sum(skipped.values()),
+    }
+    return routes
+
+
+def print_report(routes: Dict[str, dict]):
+    print(f"{'scenario':<10} {'route':<36} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for name, row in routes.items():
+        print(
+            f"{name:<10} {row['route']:<36} {row['throughput_rps']:>9} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+            f"{row['p99_ms']:>9}  {row['statuses']}"
+        )
+
+
+def print_comparison(routes: Dict[str, dict], baseline: Dict[str, dict], label: str):
+    def change(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nvs {label}:")
+    print(f"{'scenario':<10} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, row in routes.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        print(
+            f"{name:<10} {change(row['throughput_rps'], old['throughput_rps']):>9} "
+            f"{change(row['p50_ms'], old['p50_ms']):>9} {change(row['p95_ms'], old['p95_ms']):>9} "
+            f"{change(row['p99_ms'], old['p99_ms']):>9}"
+        )
+
+
+async def main(args):
+    world = World(random.Random(args.seed))
+    in_process = args.base_url is None
+    if in_process:
+        use_database(args)
+        await server.startup_event()
+        client = asgi_client()
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+
+    try:
+        async with client:
+            await seed(client, world, args)
+            routes = await drive(client, world, args)
+    finally:
+        if in_process:
+            await server.shutdown_event()
+
+    print_report(routes)
+    result = {
+        "commit": git_commit(),
+        "recorded_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "target": args.base_url or ("in-process " + ("mongod" if args.mongo_url else "mongomock")),
+        "config": {
+            "mix": args.mix,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "pets": args.pets,
+            "users": args.users,
+            "image_kb": args.image_kb,
+            "seed": args.seed,
+        },
+        "routes": routes,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as out:
+            json.dump(result, out, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.compare:
+        with open(args.compare) as baseline:
+            previous = json.load(baseline)
+        print_comparison(routes, previous["routes"], f"{args.compare} ({previous.get('commit') or 'unknown commit'})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_database_args(parser)
+    parser.add_argument("--base-url", help="load a running server instead of the in-process app")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before measuring")
+    parser.add_argument("--pets", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--image-kb", type=int, default=64, help="size of each seeded pet image")
+    parser.add_argument("--admin-email", default="admin@petadoption.com")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout with --base-url")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for scenario choice")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    sys.exit(asyncio.run(main(parser.parse_args())))
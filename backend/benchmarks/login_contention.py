@@ -0,0 +1,95 @@
+"""Latency of GET /api/pets while logins hammer bcrypt.
+
+Compares hashing inline on the event loop (PASSWORD_HASH_WORKERS=0, the old
+behaviour) with the bounded thread pool::
+
+    python -m benchmarks.login_contention --logins 16 --duration 5
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import server
+from benchmarks.common import add_database_args, asgi_client, seed_pets, summarize, use_database
+from password_hasher import PasswordHasher
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench-password"
+
+
+async def seed():
+    await server.db.users.insert_one({
+        "id": str(uuid.uuid4()),
+        "email": EMAIL,
+        "password": server.pwd_context.hash(PASSWORD),
+        "name": "Bench User",
+        "role": "user",
+        "address": "",
+        "phone": "",
+    })
+    await seed_pets(200)
+
+
+async def run_mode(workers: int, args) -> dict:
+    server.password_hasher.shutdown()
+    server.password_hasher = PasswordHasher(server.pwd_context, workers, args.queue)
+    browse_latencies = []
+    login_statuses = {}
+    deadline = time.perf_counter() + args.duration
+
+    async with asgi_client() as client:
+        async def login_loop():
+            while time.perf_counter() < deadline:
+                response = await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                login_statuses[response.status_code] = login_statuses.get(response.status_code, 0) + 1
+
+        async def timed_browse(scheduled: float):
+            await client.get("/api/pets", params={"limit": 20})
+            browse_latencies.append(time.perf_counter() - scheduled)
+
+        async def browse_schedule():
+            # Open-loop arrivals: latency is measured from when each request was
+            # due, so time spent waiting for a blocked event loop is counted.
+            start = time.perf_counter()
+            tasks = []
+            while True:
+                scheduled = start + len(tasks) / args.browse_rps
+                if scheduled >= deadline:
+                    break
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                tasks.append(asyncio.create_task(timed_browse(scheduled)))
+            await asyncio.gather(*tasks)
+
+        await asyncio.gather(browse_schedule(), *[login_loop() for _ in range(args.logins)])
+
+    return {
+        "mode": f"pool({workers})" if workers else "inline",
+        "browse": summarize(browse_latencies),
+        "logins_per_second": round(sum(login_statuses.values()) / args.duration, 1),
+        "login_statuses": login_statuses,
+    }
+
+
+async def main(args):
+    use_database(args)
+    await seed()
+    for workers in (0, args.workers):
+        result = await run_mode(workers, args)
+        browse = result["browse"]
+        print(
+            f"{result['mode']:>10}: /api/pets p50={browse['p50_ms']}ms p99={browse['p99_ms']}ms "
+            f"({browse['count']} requests), logins/s={result['logins_per_second']} {result['login_statuses']}"
+        )
+    server.password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_database_args(parser)
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login clients")
+    parser.add_argument("--browse-rps", type=float, default=50, help="/api/pets request rate")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per mode")
+    parser.add_argument("--workers", type=int, default=server.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--queue", type=int, default=server.PASSWORD_HASH_QUEUE)
+    asyncio.run(main(parser.parse_args()))
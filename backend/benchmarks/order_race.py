@@ -0,0 +1,67 @@
+"""Concurrency stress test for POST /api/orders: no pet may be adopted twice.
+
+Many users race to order the same pet, round after round. Exits non-zero if
+any pet ends up with more than one successful order::
+
+    python -m benchmarks.order_race --users 50 --rounds 20
+    python -m benchmarks.order_race --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from collections import Counter
+
+import server
+from benchmarks.common import add_database_args, asgi_client, seed_pets, use_database
+from indexes import ensure_indexes
+
+
+async def seed_users(count: int):
+    users = [
+        {
+            "id": str(uuid.uuid4()),
+            "email": f"racer{i}@example.com",
+            "password": "",
+            "name": f"Racer {i}",
+            "role": "user",
+            "address": "",
+            "phone": "",
+        }
+        for i in range(count)
+    ]
+    await server.db.users.insert_many(users)
+    return [{"Authorization": f"Bearer {server.create_jwt_token({'sub': u['id'], 'role': 'user'})}"} for u in users]
+
+
+async def main(args) -> int:
+    use_database(args)
+    await ensure_indexes(server.db)
+    await seed_pets(args.rounds)
+    pet_ids = [pet["id"] async for pet in server.db.pets.find({}, {"id": 1})]
+    headers = await seed_users(args.users)
+
+    failures = 0
+    statuses = Counter()
+    async with asgi_client() as client:
+        for pet_id in pet_ids:
+            order = {"pet_id": pet_id, "shipping_name": "x", "shipping_address": "x", "shipping_phone": "x"}
+            responses = await asyncio.gather(*[client.post("/api/orders", json=order, headers=h) for h in headers])
+            statuses.update(r.status_code for r in responses)
+            won = sum(r.status_code == 200 for r in responses)
+            stored = await server.db.orders.count_documents({"pet_id": pet_id})
+            if won != 1 or stored != 1:
+                failures += 1
+                print(f"pet {pet_id}: {won} successful responses, {stored} orders stored")
+
+    print(f"{len(pet_ids)} pets x {args.users} concurrent users: statuses {dict(statuses)}")
+    print("FAIL: double booking detected" if failures else "OK: every pet adopted exactly once")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_database_args(parser)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    sys.exit(asyncio.run(main(parser.parse_args())))
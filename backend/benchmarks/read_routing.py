@@ -0,0 +1,240 @@
+"""Where API reads land on a replica set, and read-your-writes after an order.
+
+Needs a replica set; mongomock and a standalone mongod have no secondaries.
+``--mongod`` starts a throwaway three-member set on local ports as a stand-in,
+``--mongo-url`` uses an existing one (add ``w=1`` to the URL, see below)::
+
+    python -m benchmarks.read_routing --mongod mongod
+
+First each endpoint is called once and its Mongo commands are tallied by the
+member that served them: catalog, image, search and stats reads must stay off
+the primary, order and auth reads must stay on it. Then replication is paused
+on the secondaries with ``fsyncLock`` and an order is placed. A plain secondary
+read still sees the pet as available; a batch lookup sent with the order's
+consistency token has to wait for replication to resume and see it taken.
+The app writes with ``w=1`` so that the order itself doesn't wait on the paused
+members. Exits non-zero if any check fails.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Tuple
+
+from pymongo import MongoClient, monitoring
+
+import server
+from benchmarks.common import asgi_client, seed_pets
+from benchmarks.load_test import PNG
+
+REPLICA_SET = "rs0"
+SECONDARY_STEPS = ("catalog", "search", "batch", "image", "stats")
+PRIMARY_STEPS = ("login", "orders", "create order")
+
+step: ContextVar[str] = ContextVar("step", default="setup")
+
+
+class CommandTally(monitoring.CommandListener):
+    """Commands per step and member; Motor's executor threads inherit ``step``."""
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[Tuple[str, int], int]] = {}
+
+    def started(self, event):
+        # Authenticating the admin is an auth read; that belongs to the login row
+        if event.command.get(event.command_name) == "users" and step.get() != "login":
+            return
+        members = self.counts.setdefault(step.get(), {})
+        members[event.connection_id] = members.get(event.connection_id, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def start_replica_set(mongod: str, base_port: int, workdir: str) -> Tuple[List[subprocess.Popen], str]:
+    hosts = [f"127.0.0.1:{base_port + i}" for i in range(3)]
+    processes = []
+    for i, host in enumerate(hosts):
+        path = os.path.join(workdir, f"member{i}")
+        os.makedirs(path)
+        processes.append(subprocess.Popen(
+            [mongod, "--replSet", REPLICA_SET, "--port", host.rsplit(":", 1)[1], "--dbpath", path,
+             "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL,
+        ))
+    with MongoClient(hosts[0], directConnection=True, serverSelectionTimeoutMS=30000) as first:
+        # Only the first member may become primary, so the roles are predictable
+        first.admin.command("replSetInitiate", {
+            "_id": REPLICA_SET,
+            "members": [{"_id": i, "host": host, "priority": 0 if i else 1} for i, host in enumerate(hosts)],
+        })
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            states = [member["stateStr"] for member in first.admin.command("replSetGetStatus")["members"]]
+            if states == ["PRIMARY", "SECONDARY", "SECONDARY"]:
+                break
+            time.sleep(0.5)
+        else:
+            raise RuntimeError(f"replica set not ready: {states}")
+    return processes, f"mongodb://{','.join(hosts)}/?replicaSet={REPLICA_SET}&w=1"
+
+
+def wait_replicated(members: List[MongoClient], db_name: str, pet_id: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while any(member[db_name].pets.find_one({"id": pet_id}) is None for member in members):
+        if time.monotonic() > deadline:
+            raise RuntimeError("secondaries did not catch up")
+        time.sleep(0.1)
+
+
+def order(pet_id: str) -> Dict[str, str]:
+    return {
+        "pet_id": pet_id,
+        "shipping_name": "Replica Check",
+        "shipping_address": "1 Oplog Lane",
+        "shipping_phone": "+15550000000",
+    }
+
+
+async def survey(client, admin: Dict[str, str], pet_ids: List[str], order_pet: str):
+    calls = {
+        "catalog": lambda: client.get("/api/pets", params={"limit": 20}),
+        "search": lambda: client.get("/api/pets/search", params={"q": "Pet"}),
+        "batch": lambda: client.post("/api/pets/batch", json={"ids": pet_ids[:5]}),
+        "image": lambda: client.get(f"/api/pets/{pet_ids[0]}/image"),
+        "stats": lambda: client.get("/api/admin/stats", headers=admin),
+        "login": lambda: client.post(
+            "/api/auth/login", json={"email": "admin@petadoption.com", "password": "admin123"}
+        ),
+        "orders": lambda: client.get("/api/orders", headers=admin),
+        "create order": lambda: client.post("/api/orders", json=order(order_pet), headers=admin),
+    }
+    for name, call in calls.items():
+        step.set(name)
+        response = await call()
+        if response.status_code != 200:
+            raise RuntimeError(f"{name}: {response.status_code} {response.text}")
+    step.set("setup")
+
+
+def report_routing(tally: CommandTally, primary: Tuple[str, int]) -> bool:
+    ok = True
+    print(f"{'step':<14} {'primary':>8} {'secondary':>10}")
+    for name in SECONDARY_STEPS + PRIMARY_STEPS:
+        members = tally.counts.get(name, {})
+        on_primary = sum(count for member, count in members.items() if member == primary)
+        on_secondary = sum(members.values()) - on_primary
+        expected = on_primary == 0 if name in SECONDARY_STEPS else on_secondary == 0
+        ok = ok and expected
+        print(f"{name:<14} {on_primary:>8} {on_secondary:>10}{'' if expected else '  <- wrong member'}")
+    return ok
+
+
+async def check_read_your_writes(
+    client, admin: Dict[str, str], secondaries: List[MongoClient], pet_id: str, lag: float
+) -> bool:
+    locked = []
+    try:
+        for member in secondaries:
+            member.admin.command("fsync", lock=True)
+            locked.append(member)
+        response = await client.post("/api/orders", json=order(pet_id), headers=admin)
+        token = response.headers.get(server.CONSISTENCY_HEADER)
+        if response.status_code != 200 or not token:
+            print(f"order failed or returned no consistency token: {response.status_code}")
+            return False
+        stale = secondaries[0][server.DB_NAME].pets.find_one({"id": pet_id}, {"_id": 0, "available": 1})
+
+        def resume():
+            while locked:
+                locked.pop().admin.command("fsyncUnlock")
+
+        asyncio.get_running_loop().call_later(lag, resume)
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/pets/batch", json={"ids": [pet_id]}, headers={server.CONSISTENCY_HEADER: token}
+        )
+        waited = time.perf_counter() - started
+    finally:
+        while locked:
+            locked.pop().admin.command("fsyncUnlock")
+
+    available = response.json()["items"][0]["available"]
+    print(f"\nreplication paused, order placed for {pet_id}")
+    print(f"  plain secondary read:      available={stale['available']}")
+    print(f"  batch read with the token: available={available} after {waited:.2f}s (replication resumed after {lag}s)")
+    return stale["available"] is True and available is False
+
+
+async def run(url: str, args) -> bool:
+    tally = CommandTally()
+    monitoring.register(tally)
+    server.MONGO_URL, server.DB_NAME = url, args.db_name
+    server.connect_database()
+    await server.client.drop_database(args.db_name)
+    await server.startup_event()
+    await seed_pets(args.pets)
+    try:
+        async with asgi_client() as client:
+            login = await client.post(
+                "/api/auth/login", json={"email": "admin@petadoption.com", "password": "admin123"}
+            )
+            admin = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            added = await client.post(
+                "/api/pets",
+                data={"name": "Pet image", "category": "Dog", "weight": "10", "height": "40", "breed": "Breed 0",
+                      "gender": "male", "description": "Has an image"},
+                files={"image": ("pet.png", PNG, "image/png")},
+                headers=admin,
+            )
+            pets = await server.db.pets.find({"available": True}, {"_id": 0, "id": 1}).to_list(length=None)
+            pet_ids = [added.json()["id"]] + [pet["id"] for pet in pets if pet["id"] != added.json()["id"]]
+
+            secondaries = [MongoClient(host, port, directConnection=True) for host, port in server.client.secondaries]
+            if not secondaries:
+                raise RuntimeError("no secondaries; point --mongo-url at a replica set")
+            wait_replicated(secondaries, args.db_name, added.json()["id"])
+
+            await survey(client, admin, pet_ids, pet_ids[-1])
+            routed = report_routing(tally, server.client.primary)
+            consistent = await check_read_your_writes(client, admin, secondaries, pet_ids[-2], args.lag)
+            for member in secondaries:
+                member.close()
+    finally:
+        await server.shutdown_event()
+    return routed and consistent
+
+
+def main(args) -> int:
+    processes = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            url = args.mongo_url
+            if args.mongod:
+                processes, url = start_replica_set(args.mongod, args.port, workdir)
+            ok = asyncio.run(run(url, args))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+    print("\nOK" if ok else "\nFAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--mongod", help="path to a mongod binary; starts a local three-member replica set")
+    target.add_argument("--mongo-url", help="an existing replica set")
+    parser.add_argument("--port", type=int, default=27400, help="first port for --mongod members")
+    parser.add_argument("--db-name", default="pet_adoption_read_routing")
+    parser.add_argument("--pets", type=int, default=200)
+    parser.add_argument("--lag", type=float, default=1.0, help="seconds replication stays paused after the order")
+    sys.exit(main(parser.parse_args()))
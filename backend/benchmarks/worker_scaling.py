@@ -0,0 +1,135 @@
+"""Throughput of the multi-worker server as WEB_CONCURRENCY grows.
+
+Starts ``python server.py`` once per worker count against a real mongod (worker
+processes can't share mongomock), waits for it to answer, and loads it with
+``benchmarks.load_test`` over HTTP. Each worker count gets its own database so
+runs don't see each other's data::
+
+    python -m benchmarks.worker_scaling --mongo-url mongodb://localhost:27017 --workers 1,2,4,8
+
+A single load generator process tops out long before a multi-core server
+does; ``--client-processes`` runs several in parallel and sums their
+throughput (latency percentiles are reported from the slowest client).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/pets", params={"limit": 1}, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"server not ready after {timeout}s")
+
+
+def start_server(workers: int, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MONGO_URL": args.mongo_url,
+        "DB_NAME": f"{args.db_name}_{workers}w",
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(args.port),
+        "HOST": "127.0.0.1",
+        "MONGO_MAX_POOL_SIZE": str(args.max_pool_size),
+        "RATE_LIMIT_ENABLED": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "server.py"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def run_clients(base_url: str, workdir: str, args) -> list:
+    outputs = [os.path.join(workdir, f"client{i}.json") for i in range(args.client_processes)]
+    clients = [
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.load_test", "--base-url", base_url,
+                "--mix", args.mix, "--concurrency", str(args.concurrency),
+                "--duration", str(args.duration), "--warmup", str(args.warmup),
+                "--pets", str(args.pets), "--users", str(args.users), "--seed", str(i + 1),
+                "--output", output,
+            ],
+            cwd=BACKEND_DIR,
+            stdout=subprocess.DEVNULL,
+        )
+        for i, output in enumerate(outputs)
+    ]
+    for client in clients:
+        if client.wait() != 0:
+            raise RuntimeError("load generator failed")
+    results = []
+    for output in outputs:
+        with open(output) as result:
+            results.append(json.load(result)["routes"]["total"])
+    return results
+
+
+def main(args) -> int:
+    base_url = f"http://127.0.0.1:{args.port}"
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for workers in args.workers:
+            server = start_server(workers, args)
+            try:
+                wait_until_ready(base_url, server, args.startup_timeout)
+                totals = run_clients(base_url, workdir, args)
+            finally:
+                # SIGTERM: uvicorn drains requests and runs shutdown in every worker
+                server.terminate()
+                server.wait()
+            rps = sum(total["throughput_rps"] for total in totals)
+            rows.append({
+                "workers": workers,
+                "throughput_rps": round(rps, 1),
+                "p50_ms": max(total["p50_ms"] for total in totals),
+                "p99_ms": max(total["p99_ms"] for total in totals),
+            })
+            row = rows[-1]
+            speedup = row["throughput_rps"] / rows[0]["throughput_rps"] if rows[0]["throughput_rps"] else 0.0
+            print(
+                f"{workers:>3} workers: {row['throughput_rps']:>9} req/s  x{speedup:.2f}  "
+                f"p50={row['p50_ms']}ms p99={row['p99_ms']}ms"
+            )
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump({"cpus": os.cpu_count(), "mix": args.mix, "results": rows}, out, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", required=True)
+    parser.add_argument("--db-name", default="pet_adoption_scaling")
+    parser.add_argument(
+        "--workers", type=lambda text: [int(n) for n in text.split(",")],
+        default=sorted({1, 2, os.cpu_count() or 1}), help="comma-separated worker counts",
+    )
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--max-pool-size", type=int, default=100, help="MONGO_MAX_POOL_SIZE per worker")
+    parser.add_argument("--client-processes", type=int, default=2)
+    parser.add_argument("--mix", default="browse=70,image=25,order=3,approve=2")
+    parser.add_argument("--concurrency", type=int, default=64, help="virtual users per client process")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--pets", type=int, default=200)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,157 @@
+"""Content-addressed storage for pet images.
+
+Blobs are keyed by the SHA-256 of their bytes, so uploading the same photo twice
+stores it once. Two backends are available: a local filesystem store that can
+hand files straight to ``FileResponse``, and a GridFS store for deployments
+without shared disk.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import AsyncIterator, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+CHUNK_SIZE = 1024 * 1024
+
+
+async def iter_upload(upload, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    # Works for starlette UploadFile or anything else with an async read(n)
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_bytes(data: bytes, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+class BlobStore:
+    async def put_stream(self, chunks: AsyncIterator[bytes]) -> Tuple[str, int]:
+        """Store a stream of chunks and return ``(sha256 hex digest, size)``."""
+        raise NotImplementedError
+
+    async def put(self, data: bytes) -> Tuple[str, int]:
+        return await self.put_stream(iter_bytes(data))
+
+    async def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    async def open(self, digest: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield ``length`` bytes of the blob (all of it by default) from ``start``, in chunks."""
+        raise NotImplementedError
+        yield b""
+
+    async def read(self, digest: str) -> bytes:
+        return b"".join([chunk async for chunk in self.open(digest)])
+
+    def local_path(self, digest: str) -> Optional[str]:
+        """Filesystem path of the blob, if the backend keeps one."""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, digest: str) -> str:
+        # Shard by prefix so no single directory grows unboundedly
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    async def put_stream(self, chunks: AsyncIterator[bytes]) -> Tuple[str, int]:
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                async for chunk in chunks:
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    await asyncio.to_thread(tmp.write, chunk)
+            digest = hasher.hexdigest()
+            path = self.path_for(digest)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest, size
+
+    async def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path_for(digest))
+
+    async def open(self, digest: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        remaining = float("inf") if length is None else length
+        with open(self.path_for(digest), "rb") as blob:
+            blob.seek(start)
+            while remaining > 0:
+                chunk = await asyncio.to_thread(blob.read, int(min(CHUNK_SIZE, remaining)))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def local_path(self, digest: str) -> Optional[str]:
+        return self.path_for(digest)
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, db, bucket_name: str = "pet_images"):
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name, chunk_size_bytes=255 * 1024)
+        self.files = db[f"{bucket_name}.files"]
+
+    async def put_stream(self, chunks: AsyncIterator[bytes]) -> Tuple[str, int]:
+        hasher = hashlib.sha256()
+        size = 0
+        # The digest is only known once the upload is complete, so write under a
+        # temporary name and rename (or drop the duplicate) afterwards.
+        stream = self.bucket.open_upload_stream(f"tmp-{os.urandom(8).hex()}")
+        try:
+            async for chunk in chunks:
+                hasher.update(chunk)
+                size += len(chunk)
+                await stream.write(chunk)
+            await stream.close()
+        except BaseException:
+            await stream.abort()
+            raise
+        digest = hasher.hexdigest()
+        if await self.exists(digest):
+            await self.bucket.delete(stream._id)
+        else:
+            await self.bucket.rename(stream._id, digest)
+        return digest, size
+
+    async def exists(self, digest: str) -> bool:
+        return await self.files.find_one({"filename": digest}, {"_id": 1}) is not None
+
+    async def open(self, digest: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        grid_out = await self.bucket.open_download_stream_by_name(digest)
+        if start:
+            grid_out.seek(start)
+        remaining = float("inf") if length is None else length
+        while remaining > 0:
+            chunk = await grid_out.readchunk()
+            if not chunk:
+                break
+            chunk = chunk[:int(min(len(chunk), remaining))]
+            remaining -= len(chunk)
+            yield chunk
+
+
+def create_blob_store(backend: str, db=None, root: Optional[str] = None) -> BlobStore:
+    if backend == "local":
+        return LocalBlobStore(root)
+    if backend == "gridfs":
+        return GridFSBlobStore(db)
+    raise ValueError(f"Unknown blob store backend: {backend}")
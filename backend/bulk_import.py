@@ -0,0 +1,100 @@
+"""Readers for bulk pet imports: a CSV/NDJSON manifest plus a zip or tar of images.
+
+Both readers work incrementally from files on disk. The manifest is parsed
+row by row and archive members are visited in archive order, so a tar can be
+read in a single forward pass and only one image is held at a time.
+"""
+import asyncio
+import csv
+import json
+import os
+import tarfile
+import zipfile
+from typing import IO, Any, AsyncIterator, Dict, Iterator, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def manifest_format(filename: str, content_type: str = "") -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    raise ManifestError("Manifest must be a .csv or .ndjson file")
+
+
+def read_manifest(path: str, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(row number, row dict)``; unparsable lines yield a ``ManifestError``."""
+    with open(path, newline="", encoding="utf-8-sig") as manifest:
+        if fmt == "csv":
+            for row_number, row in enumerate(csv.DictReader(manifest), start=1):
+                # DictReader files surplus values under None, e.g. from an unquoted comma
+                if None in row:
+                    yield row_number, ManifestError("Too many fields")
+                    continue
+                yield row_number, row
+            return
+        for row_number, line in enumerate(manifest, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield row_number, ManifestError(f"Invalid JSON: {exc}")
+                continue
+            if not isinstance(row, dict):
+                yield row_number, ManifestError("Each line must be a JSON object")
+                continue
+            yield row_number, row
+
+
+def normalize_member_name(name: str) -> str:
+    return name.replace("\\", "/").lstrip("./")
+
+
+def iter_archive(path: str) -> Iterator[Tuple[str, IO[bytes]]]:
+    """Yield ``(member name, file object)`` for every regular file in a zip or tar."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as member:
+                        yield normalize_member_name(info.filename), member
+        return
+    try:
+        archive = tarfile.open(path, "r|*")
+    except tarfile.TarError:
+        raise ManifestError("Images must be a zip or tar archive")
+    with archive:
+        for info in archive:
+            if info.isfile():
+                yield normalize_member_name(info.name), archive.extractfile(info)
+
+
+async def next_member(members: Iterator[Tuple[str, IO[bytes]]]):
+    # Archive headers are read synchronously; keep that off the event loop
+    return await asyncio.to_thread(next, members, None)
+
+
+async def iter_member(member: IO[bytes]) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await asyncio.to_thread(member.read, CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def match_keys(member_name: str) -> Tuple[str, str]:
+    return member_name, os.path.basename(member_name)
+
+
+def index_rows_by_image(rows: Dict[int, Dict[str, Any]]) -> Dict[str, list]:
+    by_image: Dict[str, list] = {}
+    for row_number, row in rows.items():
+        by_image.setdefault(normalize_member_name(row["image"]), []).append(row_number)
+    return by_image
@@ -0,0 +1,128 @@
+"""Response cache for the public pet catalog.
+
+``GET /api/pets`` is anonymous and read-heavy, while the catalog only changes
+when a pet is added or its availability flips. Pages are cached as ready-to-send
+JSON bytes keyed by their query parameters. Every write bumps ``version`` and
+drops all entries; a fill that started before the bump is discarded so a slow
+read can't re-insert stale data. Compressed copies of a page are kept in the
+page's entry, so they are evicted with it; their lookups are counted apart from
+the page lookups.
+
+Write handlers invalidate their own worker directly. ``watch`` follows a Mongo
+change stream on ``pets`` so that writes made by other workers invalidate this
+one too; updates only count when they touch a field the pages show, so
+bookkeeping such as thumbnail variants doesn't flush the cache. On a
+standalone mongod (no change streams) it logs and gives up, and the cache is
+then only coherent within a single worker. The newest change it saw is kept as
+``change_point``: a refill must read at least that far, or a lagging secondary
+could hand back the page from before that write and it would stay cached.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+from pymongo.errors import PyMongoError
+
+from read_routing import ConsistencyPoint
+
+logger = logging.getLogger(__name__)
+
+WATCH_RETRY_SECONDS = 5
+
+
+class CatalogCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.version = 0
+        # key -> {None: page, encoding: compressed page}
+        self._entries: "OrderedDict[Hashable, Dict[Optional[str], bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.compressed_hits = 0
+        self.compressed_misses = 0
+        self.invalidations = 0
+        self.change_point: Optional[ConsistencyPoint] = None
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[None]
+
+    def put(self, key: Hashable, body: bytes, version: int):
+        # The catalog changed while this page was being built; don't cache it
+        if version != self.version:
+            return
+        self._entries[key] = {None: body}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_encoded(self, key: Hashable, body: bytes, encoding: str) -> Optional[bytes]:
+        """The cached ``encoding`` copy of ``body``, if ``body`` is still the cached page."""
+        entry = self._entries.get(key)
+        encoded = entry.get(encoding) if entry is not None and entry[None] is body else None
+        if encoded is None:
+            self.compressed_misses += 1
+        else:
+            self.compressed_hits += 1
+        return encoded
+
+    def put_encoded(self, key: Hashable, body: bytes, encoding: str, encoded: bytes):
+        # Only alongside the very page it was made from
+        entry = self._entries.get(key)
+        if entry is not None and entry[None] is body:
+            entry[encoding] = encoded
+
+    def invalidate(self):
+        self.version += 1
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "compressed_hits": self.compressed_hits,
+            "compressed_misses": self.compressed_misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def watch(self, collection, fields: Iterable[str]):
+        fields = list(fields)
+        pipeline = [
+            {"$match": {"$or": [
+                {"operationType": {"$ne": "update"}},
+                {"updateDescription.removedFields": {"$in": fields}},
+                *({f"updateDescription.updatedFields.{field}": {"$exists": True}} for field in fields),
+            ]}},
+        ]
+        while True:
+            try:
+                async with collection.watch(pipeline) as stream:
+                    # Anything may have changed while we weren't listening
+                    self.invalidate()
+                    async for change in stream:
+                        if change.get("clusterTime") is not None:
+                            self.change_point = ConsistencyPoint(change["clusterTime"], None)
+                        self.invalidate()
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as exc:
+                if getattr(exc, "code", None) == 40573:
+                    logger.info("Change streams need a replica set; catalog cache is per-worker only")
+                    return
+                logger.warning("Catalog change stream failed, retrying in %ss", WATCH_RETRY_SECONDS, exc_info=True)
+                self.invalidate()
+                await asyncio.sleep(WATCH_RETRY_SECONDS)
+            except Exception:
+                logger.info("Change streams unavailable; catalog cache is per-worker only", exc_info=True)
+                return
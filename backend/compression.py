@@ -0,0 +1,157 @@
+"""Content-negotiated gzip/brotli response compression.
+
+``CompressionMiddleware`` compresses text-like responses (JSON, NDJSON, CSV,
+HTML) of at least ``min_size`` bytes for clients that accept it. It leaves
+images and other binary types alone, along with server-sent events (each event
+must reach the client as soon as it is written) and partial content. Responses
+that already carry a ``Content-Encoding`` pass through untouched; that is how
+handlers serve bodies they compressed ahead of time, such as cached catalog
+pages. Streamed responses are compressed incrementally.
+
+Brotli is used when the ``brotli`` package is installed and preferred by the
+client's ``Accept-Encoding``; otherwise gzip.
+"""
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SUPPORTED = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+SKIPPED_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported encoding for an ``Accept-Encoding`` header, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip()] = quality
+    wildcard = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    # SUPPORTED is in order of preference, so ties go to the earlier entry
+    for coding in SUPPORTED:
+        quality = weights.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(SKIPPED_TYPES)
+
+
+class Encoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress, self._flush = self._compressor.process, self._compressor.finish
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress, self._flush = self._compressor.compress, self._compressor.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    encoder = Encoder(encoding, gzip_level, brotli_quality)
+    return encoder.compress(data) + encoder.finish()
+
+
+def with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = dict(scope["headers"])
+        encoding = choose_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers back until the first body chunk tells us the size
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = {name.lower(): value for name, value in start["headers"]}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    start["status"] in (204, 206, 304)
+                    or b"content-encoding" in headers
+                    or b"content-range" in headers
+                    or not compressible(content_type)
+                    or (not more_body and len(body) < self.min_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = Encoder(encoding, self.gzip_level, self.brotli_quality)
+                response_headers = [
+                    (name, value) for name, value in start["headers"] if name.lower() != b"content-length"
+                ]
+                response_headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    body = encoder.compress(body) + encoder.finish()
+                    response_headers.append((b"content-length", str(len(body)).encode()))
+                    await send({**start, "headers": with_vary(response_headers)})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send({**start, "headers": with_vary(response_headers)})
+
+            chunk = encoder.compress(body)
+            if not more_body:
+                chunk += encoder.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+        # A response with no body messages at all
+        if start is not None and encoder is None and not passthrough:
+            await send(start)
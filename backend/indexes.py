@@ -0,0 +1,95 @@
+"""Index registry for every collection the API queries.
+
+``INDEXES`` is applied at startup by ``ensure_indexes``. ``QUERY_SHAPES`` lists
+the filters and sorts the handlers actually issue; ``tools.check_query_plans``
+explains each one against a live mongod and fails on any collection scan.
+When a handler gains a new query, add its shape here together with the index
+that serves it.
+"""
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+NEWEST_FIRST = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        # Makes registration race-free; the handler's find_one is only a fast path
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("role", ASCENDING)]),
+    ],
+    "pets": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("available", ASCENDING)] + NEWEST_FIRST),
+        IndexModel([("available", ASCENDING), ("category", ASCENDING)] + NEWEST_FIRST),
+        IndexModel([("available", ASCENDING), ("breed", ASCENDING)] + NEWEST_FIRST),
+        IndexModel([("available", ASCENDING), ("gender", ASCENDING)] + NEWEST_FIRST),
+        # Weights are mirrored by search_index.FIELD_WEIGHTS for the in-process fallback
+        IndexModel(
+            [("name", TEXT), ("breed", TEXT), ("category", TEXT), ("description", TEXT)],
+            weights={"name": 10, "breed": 5, "category": 5, "description": 1},
+            name="pet_text_search",
+        ),
+    ],
+    "orders": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        # Pending and approved orders carry active_pet_id (rejected ones drop it),
+        # so a sparse unique index allows at most one active order per pet
+        IndexModel([("active_pet_id", ASCENDING)], unique=True, sparse=True, name="one_active_order_per_pet"),
+        IndexModel(NEWEST_FIRST),
+        IndexModel([("user_id", ASCENDING)] + NEWEST_FIRST),
+        IndexModel([("status", ASCENDING)] + NEWEST_FIRST),
+        IndexModel([("pet_id", ASCENDING)] + NEWEST_FIRST),
+    ],
+    "import_jobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    # Dashboard counters, upserted by (metric, key); see stats.py
+    "stat_counters": [
+        IndexModel([("metric", ASCENDING), ("key", ASCENDING)], unique=True),
+    ],
+}
+
+
+class QueryShape(NamedTuple):
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List] = None
+
+
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("get_current_user", "users", {"id": "x"}),
+    QueryShape("login / register", "users", {"email": "x"}),
+    QueryShape("startup admin check", "users", {"role": "admin"}),
+    QueryShape("get_pets", "pets", {"available": True}, NEWEST_FIRST),
+    QueryShape("get_pets by category", "pets", {"available": True, "category": "x"}, NEWEST_FIRST),
+    QueryShape("get_pets by breed", "pets", {"available": True, "breed": "x"}, NEWEST_FIRST),
+    QueryShape("get_pets by gender", "pets", {"available": True, "gender": "male"}, NEWEST_FIRST),
+    QueryShape("get_pets by weight", "pets", {"available": True, "weight": {"$gte": 1, "$lte": 9}}, NEWEST_FIRST),
+    QueryShape("search_pets", "pets", {"$text": {"$search": "x"}, "available": True}),
+    QueryShape("get_pet_image / create_order", "pets", {"id": "x", "available": True}),
+    QueryShape("release pets / get_pets_batch", "pets", {"id": {"$in": ["x", "y"]}}),
+    QueryShape("get_orders (admin)", "orders", {}, NEWEST_FIRST),
+    QueryShape("get_orders (user)", "orders", {"user_id": "x"}, NEWEST_FIRST),
+    QueryShape("get_orders by status", "orders", {"status": "pending"}, NEWEST_FIRST),
+    QueryShape("get_orders by pet", "orders", {"pet_id": "x"}, NEWEST_FIRST),
+    QueryShape("update_order_status", "orders", {"id": "x", "status": {"$ne": "rejected"}}),
+    QueryShape("bulk order status", "orders", {"id": {"$in": ["x", "y"]}}),
+    QueryShape("get_import_job", "import_jobs", {"id": "x"}),
+]
+
+
+async def ensure_indexes(db):
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure:
+            # Typically duplicate data blocking a unique index; keep serving and
+            # let the operator clean up rather than refusing to start
+            logger.exception("Could not create indexes on %s", collection)
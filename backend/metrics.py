@@ -0,0 +1,217 @@
+"""Request latency and Mongo command metrics in Prometheus text format.
+
+``MetricsMiddleware`` times every HTTP request and files it under its route
+template (``/api/orders/{order_id}/status``, not the concrete path).
+``CommandRecorder`` is a pymongo command listener; Motor runs each operation on
+an executor thread with a copy of the caller's context, so the listener can
+attribute round-trips and server time (and, when asked, reply bytes) to the
+request that issued them through a context variable. ``render`` produces the
+``/metrics`` page.
+
+Reply bytes are off by default: pymongo only hands listeners the decoded
+reply, and encoding every catalog page or export a second time to measure it
+costs real CPU.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+import bson
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMMANDS_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 32)
+
+UNMATCHED_ROUTE = "unmatched"
+NO_REQUEST = "background"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        rows, running = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            rows.append((format_bound(bound), running))
+        rows.append(("+Inf", self.count))
+        return rows
+
+
+def format_bound(bound: float) -> str:
+    return str(int(bound)) if float(bound).is_integer() else repr(bound)
+
+
+class RequestDbStats:
+    """Mongo work done on behalf of one request."""
+
+    def __init__(self):
+        self.commands: Dict[str, int] = {}
+        self.reply_bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def total_commands(self) -> int:
+        return sum(self.commands.values())
+
+
+current_request: ContextVar[Optional[RequestDbStats]] = ContextVar("current_request", default=None)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        # Listener callbacks run on Motor's executor threads
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.commands_per_request: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+        self.db_commands: Dict[Tuple[str, str], int] = {}
+        self.db_reply_bytes: Dict[str, int] = {}
+        self.db_seconds: Dict[str, float] = {}
+        self.background = RequestDbStats()
+        self.reply_bytes = False
+
+    def record_command(self, stats: Optional[RequestDbStats], command: str, reply_bytes: int, seconds: float):
+        with self._lock:
+            stats = stats or self.background
+            stats.commands[command] = stats.commands.get(command, 0) + 1
+            stats.reply_bytes += reply_bytes
+            stats.seconds += seconds
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, db: RequestDbStats):
+        key = (method, route)
+        with self._lock:
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.commands_per_request.setdefault(key, Histogram(COMMANDS_BUCKETS)).observe(db.total_commands)
+            self.responses[(method, route, status)] = self.responses.get((method, route, status), 0) + 1
+            for command, count in db.commands.items():
+                self.db_commands[(route, command)] = self.db_commands.get((route, command), 0) + count
+            self.db_reply_bytes[route] = self.db_reply_bytes.get(route, 0) + db.reply_bytes
+            self.db_seconds[route] = self.db_seconds.get(route, 0.0) + db.seconds
+
+    def render(self) -> str:
+        with self._lock:
+            background = self.background
+            for command, count in background.commands.items():
+                key = (NO_REQUEST, command)
+                self.db_commands[key] = self.db_commands.get(key, 0) + count
+            self.db_reply_bytes[NO_REQUEST] = self.db_reply_bytes.get(NO_REQUEST, 0) + background.reply_bytes
+            self.db_seconds[NO_REQUEST] = self.db_seconds.get(NO_REQUEST, 0.0) + background.seconds
+            self.background = RequestDbStats()
+
+            lines: List[str] = []
+            render_histograms(
+                lines, "http_request_duration_seconds", "HTTP request latency by route.", self.latency
+            )
+            render_histograms(
+                lines, "http_request_mongo_commands", "Mongo commands issued per HTTP request.", self.commands_per_request
+            )
+            lines += ["# HELP http_responses_total HTTP responses by route and status.", "# TYPE http_responses_total counter"]
+            for (method, route, status), count in sorted(self.responses.items()):
+                lines.append(f'http_responses_total{{{labels(method=method, route=route, status=status)}}} {count}')
+            lines += ["# HELP mongo_commands_total Mongo round-trips by route and command.", "# TYPE mongo_commands_total counter"]
+            for (route, command), count in sorted(self.db_commands.items()):
+                lines.append(f'mongo_commands_total{{{labels(route=route, command=command)}}} {count}')
+            if self.reply_bytes:
+                lines += ["# HELP mongo_reply_bytes_total BSON bytes returned by Mongo by route.", "# TYPE mongo_reply_bytes_total counter"]
+                for route, value in sorted(self.db_reply_bytes.items()):
+                    lines.append(f'mongo_reply_bytes_total{{{labels(route=route)}}} {value}')
+            lines += ["# HELP mongo_command_seconds_total Time spent in Mongo commands by route.", "# TYPE mongo_command_seconds_total counter"]
+            for route, value in sorted(self.db_seconds.items()):
+                lines.append(f'mongo_command_seconds_total{{{labels(route=route)}}} {value:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+def labels(**values) -> str:
+    return ",".join(f'{name}="{escape(str(value))}"' for name, value in values.items())
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_histograms(lines: List[str], name: str, help_text: str, histograms: Dict[Tuple[str, str], Histogram]):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(histograms.items()):
+        base = labels(method=method, route=route)
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{base},le="{bound}"}} {count}')
+        lines.append(f"{name}_sum{{{base}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{base}}} {histogram.count}")
+
+
+registry = MetricsRegistry()
+
+
+class CommandRecorder(monitoring.CommandListener):
+    def __init__(self, reply_bytes: bool = False):
+        self.reply_bytes = reply_bytes
+        registry.reply_bytes = registry.reply_bytes or reply_bytes
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        # pymongo only exposes the decoded reply, so measuring it means re-encoding it
+        reply_bytes = len(bson.encode(event.reply)) if self.reply_bytes else 0
+        registry.record_command(current_request.get(), event.command_name, reply_bytes, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        registry.record_command(current_request.get(), event.command_name, 0, event.duration_micros / 1e6)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, slow_request_seconds: float = 0.0):
+        self.app = app
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        db_stats = RequestDbStats()
+        token = current_request.set(db_stats)
+        started = time.perf_counter()
+        status = 500
+        finished = None
+
+        async def send_wrapper(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Stop the clock when the body is done, not after background tasks
+                finished = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            elapsed = (finished or time.perf_counter()) - started
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            registry.record_request(scope["method"], route, status, elapsed, db_stats)
+            if self.slow_request_seconds and elapsed >= self.slow_request_seconds:
+                logger.warning(
+                    "Slow request %s %s -> %s in %.3fs: %d Mongo commands %s, %.3fs in Mongo%s",
+                    scope["method"], scope["path"], status, elapsed, db_stats.total_commands,
+                    db_stats.commands, db_stats.seconds,
+                    f", {db_stats.reply_bytes} reply bytes" if registry.reply_bytes else "",
+                )
@@ -0,0 +1,48 @@
+"""Run bcrypt off the event loop.
+
+bcrypt deliberately burns 100-300 ms of CPU per call. Doing that inside an async
+handler stalls every other request on the worker, so hashing and verification
+run on a small thread pool (bcrypt releases the GIL while it works). The pool
+size caps concurrency and ``max_queue`` bounds how many callers may wait for a
+free thread; beyond that ``HasherBusy`` is raised so the API can shed load.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from passlib.context import CryptContext
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, context: CryptContext, workers: int, max_queue: int):
+        self.context = context
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        # workers=0 keeps the old behaviour of hashing inline on the event loop
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt") if workers else None
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        if self.executor is None:
+            return fn(*args)
+        if self.pending >= self.workers + self.max_queue:
+            raise HasherBusy()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
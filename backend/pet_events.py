@@ -0,0 +1,159 @@
+"""Server-sent events for catalog changes.
+
+Write handlers publish compact deltas (a pet's availability flipped, pets were
+added). Each event is encoded once into its SSE wire form and kept in a
+bounded ring buffer. Subscribers don't get a queue of their own: they remember
+the last sequence number they sent and sleep on a single shared
+``asyncio.Event`` that every publish sets and replaces. An idle connection
+therefore costs one suspended coroutine, and publishing is O(1) however many
+clients are listening.
+
+Handlers publish through ``publish_local``, which only reaches clients of the
+same worker. ``watch`` follows a change stream on ``pets`` instead, so every
+worker sees every write; while it runs, ``publish_local`` is a no-op to avoid
+duplicates. Without a replica set it logs and the handlers stay the source.
+
+Event ids are ``<epoch>-<sequence>``, where the epoch identifies this worker
+process. A reconnect carrying ``Last-Event-ID`` is replayed from the buffer.
+If the id comes from another worker or a previous run, or is older than the
+buffer, the client gets a ``reset`` event instead and should refetch the
+catalog.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE = b": keepalive\n\n"
+WATCH_RETRY_SECONDS = 5
+
+
+class PetEventBus:
+    def __init__(self, history: int):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self._events: Deque[Tuple[int, bytes]] = deque(maxlen=history)
+        self._changed = asyncio.Event()
+        self.subscribers = 0
+        self.watching = False
+
+    def event_id(self, sequence: int) -> str:
+        return f"{self.epoch}-{sequence}"
+
+    def encode(self, sequence: int, event: str, data: Any) -> bytes:
+        payload = json.dumps(data, separators=(",", ":"), default=str)
+        return f"id: {self.event_id(sequence)}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+    def publish(self, event: str, data: Any) -> int:
+        self.sequence += 1
+        self._events.append((self.sequence, self.encode(self.sequence, event, data)))
+        # Wake every subscriber at once; later ones wait on the fresh Event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return self.sequence
+
+    def publish_local(self, event: str, data: Any):
+        if not self.watching:
+            self.publish(event, data)
+
+    async def watch(self, collection, to_item: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        pipeline = [
+            {"$match": {"$or": [
+                {"operationType": "insert"},
+                {"operationType": "update", "updateDescription.updatedFields.available": {"$exists": True}},
+            ]}},
+        ]
+        while True:
+            try:
+                # updateLookup supplies the pet id and its current availability
+                async with collection.watch(pipeline, full_document="updateLookup") as stream:
+                    self.watching = True
+                    async for change in stream:
+                        pet = change.get("fullDocument")
+                        if pet is None:
+                            continue
+                        if change["operationType"] == "insert":
+                            self.publish("pets_added", {"items": [to_item(pet)]})
+                        else:
+                            self.publish("availability", {"ids": [pet["id"]], "available": pet["available"]})
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as exc:
+                if getattr(exc, "code", None) == 40573:
+                    logger.info("Change streams need a replica set; pet events only cover this worker's writes")
+                    return
+                logger.warning("Pet event change stream failed, retrying in %ss", WATCH_RETRY_SECONDS, exc_info=True)
+                # Whatever happened meanwhile is lost; tell clients to refetch
+                self.publish("reset", {})
+                await asyncio.sleep(WATCH_RETRY_SECONDS)
+            except Exception:
+                logger.info("Change streams unavailable; pet events only cover this worker's writes", exc_info=True)
+                return
+            finally:
+                self.watching = False
+
+    def resume_point(self, last_event_id: Optional[str]) -> Optional[int]:
+        """Sequence to replay after, or None if ``last_event_id`` can't be resumed here."""
+        if not last_event_id:
+            return self.sequence
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        after = int(sequence)
+        oldest = self._events[0][0] if self._events else self.sequence + 1
+        if after > self.sequence or after < oldest - 1:
+            return None
+        return after
+
+    def since(self, after: int) -> List[bytes]:
+        if after >= self.sequence:
+            return []
+        # Newest events are at the right; stop at the first one already sent
+        pending = []
+        for sequence, payload in reversed(self._events):
+            if sequence <= after:
+                break
+            pending.append(payload)
+        pending.reverse()
+        return pending
+
+    async def stream(
+        self, last_event_id: Optional[str], keepalive_seconds: float, max_seconds: float, retry_ms: int
+    ) -> AsyncIterator[bytes]:
+        self.subscribers += 1
+        try:
+            yield f"retry: {retry_ms}\n\n".encode()
+            after = self.resume_point(last_event_id)
+            if after is None:
+                after = self.sequence
+                yield self.encode(after, "reset", {})
+            loop = asyncio.get_running_loop()
+            # Closing long-lived streams lets clients rebalance across workers
+            # and keeps graceful shutdowns short; EventSource reconnects itself
+            deadline = loop.time() + max_seconds
+            while True:
+                if self.sequence > after:
+                    if self._events[0][0] > after + 1:
+                        # A slow client fell behind the ring buffer
+                        after = self.sequence
+                        yield self.encode(after, "reset", {})
+                    else:
+                        pending = self.since(after)
+                        after = self.sequence
+                        yield b"".join(pending)
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                try:
+                    await asyncio.wait_for(self._changed.wait(), min(keepalive_seconds, remaining))
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+        finally:
+            self.subscribers -= 1
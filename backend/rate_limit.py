@@ -0,0 +1,123 @@
+"""Token-bucket rate limiting for expensive endpoints.
+
+Each route has optional limits per scope (``ip``, ``user``); a request must get
+a token from every bucket that applies to it, and a rejected request takes none,
+so a user over their limit doesn't also drain their IP's bucket. A limit of
+``"10/60"`` means a bucket of 10 tokens refilled at 10 per 60 seconds, i.e.
+bursts of up to 10 and 10 a minute sustained. Buckets are keyed by route, scope and value, so one
+noisy client or account only ever drains its own buckets.
+
+Bucket state lives in a ``RateLimitStore``. ``InMemoryRateLimitStore`` keeps
+it per worker in an LRU map of bounded size: every operation is O(1), and
+when full it forgets the least recently used bucket, which has had the
+longest to refill and so is the cheapest to lose. A store shared between
+workers (e.g. Redis running the same arithmetic in a Lua script) implements
+the same ``take`` method, checking and taking all buckets in one step.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit(NamedTuple):
+    burst: float
+    per_second: float
+
+
+def parse_limit(spec: str) -> Optional[RateLimit]:
+    """``"<requests>/<seconds>"``; empty or ``"0"`` disables the limit."""
+    spec = spec.strip()
+    if spec in ("", "0"):
+        return None
+    requests, _, seconds = spec.partition("/")
+    try:
+        burst, window = float(requests), float(seconds or 1)
+    except ValueError:
+        raise ValueError(f"Invalid rate limit {spec!r}, expected '<requests>/<seconds>'")
+    if burst <= 0 or window <= 0:
+        raise ValueError(f"Invalid rate limit {spec!r}")
+    return RateLimit(burst, burst / window)
+
+
+class RateLimitStore:
+    async def take(self, buckets: Sequence[Tuple[str, RateLimit]]) -> List[float]:
+        """Take one token from every bucket, or from none of them.
+
+        Returns each bucket's wait: all 0 if the tokens were taken, otherwise
+        seconds until that bucket has a token (0 for those that have one now).
+        """
+        raise NotImplementedError
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.evictions = 0
+
+    async def take(self, buckets: Sequence[Tuple[str, RateLimit]]) -> List[float]:
+        now = time.monotonic()
+        refilled = []
+        for key, limit in buckets:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                refilled.append(limit.burst)
+            else:
+                tokens, updated_at = bucket
+                refilled.append(min(limit.burst, tokens + (now - updated_at) * limit.per_second))
+        allowed = all(tokens >= 1 for tokens in refilled)
+        for (key, _), tokens in zip(buckets, refilled):
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return [
+            0.0 if allowed or tokens >= 1 else (1 - tokens) / limit.per_second
+            for (_, limit), tokens in zip(buckets, refilled)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimiter:
+    def __init__(self, store: RateLimitStore, limits: Dict[str, Dict[str, Optional[RateLimit]]]):
+        self.store = store
+        self.limits = limits
+        self.rejected: Dict[str, int] = {}
+
+    async def check(self, route: str, **keys: Optional[str]) -> float:
+        """Seconds the caller has to wait, or 0 if every applicable bucket had a token."""
+        scopes, buckets = [], []
+        for scope, value in keys.items():
+            limit = self.limits.get(route, {}).get(scope)
+            if limit is None or not value:
+                continue
+            scopes.append(scope)
+            buckets.append((f"{route}:{scope}:{value}", limit))
+        if not buckets:
+            return 0.0
+        try:
+            waits = await self.store.take(buckets)
+        except Exception:
+            # A broken shared store shouldn't take logins down with it
+            logger.exception("Rate limit store failed; allowing request")
+            return 0.0
+        for scope, wait in zip(scopes, waits):
+            if wait:
+                self.rejected[f"{route}:{scope}"] = self.rejected.get(f"{route}:{scope}", 0) + 1
+        return max(waits)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.rejected)
+
+
+def create_store(name: str, max_keys: int) -> RateLimitStore:
+    if name == "memory":
+        return InMemoryRateLimitStore(max_keys)
+    raise ValueError(f"Unknown rate limit store: {name}")
@@ -0,0 +1,124 @@
+"""Read-preference routing and read-your-writes on a replica set.
+
+Anonymous catalog, image, search and stats reads go through a database handle
+with a secondary-friendly read preference (``secondaryPreferred`` by default),
+bounded by ``maxStalenessSeconds`` so a lagging secondary drops out of
+rotation. Orders and auth keep using the primary.
+
+A secondary can still be behind a write that just returned. ``WriteTracker`` is
+a command listener that remembers the ``operationTime`` of the newest write this
+process made, with the signed ``$clusterTime`` that came with it. Reads that
+must see those writes run in a causally consistent session advanced to that
+point (``causal_session``); the secondary serving them waits until it has
+replicated that far. The same point is handed to clients as an opaque token,
+so their next read sees their own write even when another worker serves it.
+
+A standalone mongod doesn't report ``operationTime``: nothing is tracked and
+reads run without a session, exactly as before.
+"""
+import base64
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Mapping, NamedTuple, Optional
+
+import bson
+from bson import Timestamp
+from bson.errors import BSONError
+from pymongo import monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+# The server rejects anything lower (besides -1, "no limit")
+MIN_MAX_STALENESS_SECONDS = 90
+
+WRITE_COMMANDS = frozenset({"insert", "update", "delete", "findAndModify", "commitTransaction"})
+# How the server refuses a forged or impossible point: InvalidOptions
+# (afterClusterTime ahead of the cluster), TimeProofMismatch, KeyNotFound
+REJECTED_POINT_CODES = frozenset({72, 207, 211})
+
+
+def read_preference(mode: str, max_staleness_seconds: int):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    if max_staleness_seconds != -1 and max_staleness_seconds < MIN_MAX_STALENESS_SECONDS:
+        raise ValueError(f"maxStalenessSeconds must be -1 or at least {MIN_MAX_STALENESS_SECONDS}")
+    return READ_PREFERENCES[mode](max_staleness=max_staleness_seconds)
+
+
+class ConsistencyPoint(NamedTuple):
+    operation_time: Timestamp
+    cluster_time: Optional[Mapping[str, Any]]
+
+
+def later(*points: Optional[ConsistencyPoint]) -> Optional[ConsistencyPoint]:
+    known = [point for point in points if point is not None]
+    return max(known, key=lambda point: point.operation_time) if known else None
+
+
+def encode_token(point: ConsistencyPoint) -> str:
+    document = {"t": point.operation_time}
+    if point.cluster_time is not None:
+        document["c"] = point.cluster_time
+    return base64.urlsafe_b64encode(bson.encode(document)).decode()
+
+
+def decode_token(token: str) -> ConsistencyPoint:
+    # The cluster time is signed by the server, so a forged one is rejected
+    # there (see REJECTED_POINT_CODES); here we check what the session's
+    # advance_* methods would otherwise refuse
+    try:
+        document = bson.decode(base64.urlsafe_b64decode(token.encode()))
+    except (BSONError, ValueError):
+        raise ValueError("Invalid consistency token")
+    operation_time, cluster_time = document.get("t"), document.get("c")
+    if not isinstance(operation_time, Timestamp):
+        raise ValueError("Invalid consistency token")
+    if cluster_time is not None and not (
+        isinstance(cluster_time, Mapping) and isinstance(cluster_time.get("clusterTime"), Timestamp)
+    ):
+        raise ValueError("Invalid consistency token")
+    return ConsistencyPoint(operation_time, cluster_time)
+
+
+class WriteTracker(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latest: Optional[ConsistencyPoint] = None
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name not in WRITE_COMMANDS:
+            return
+        operation_time = event.reply.get("operationTime")
+        if operation_time is None:
+            return
+        # Motor runs commands on executor threads
+        with self._lock:
+            if self.latest is None or operation_time > self.latest.operation_time:
+                self.latest = ConsistencyPoint(operation_time, event.reply.get("$clusterTime"))
+
+    def failed(self, event):
+        pass
+
+
+@asynccontextmanager
+async def causal_session(client, point: Optional[ConsistencyPoint]):
+    """A session whose reads see everything up to ``point``; None when there is nothing to wait for."""
+    if point is None or client is None:
+        yield None
+        return
+    async with await client.start_session(causal_consistency=True) as session:
+        if point.cluster_time is not None:
+            session.advance_cluster_time(point.cluster_time)
+        session.advance_operation_time(point.operation_time)
+        yield session
@@ -0,0 +1,54 @@
+"""In-process full-text search over pets.
+
+Production search runs on the Mongo text index. This inverted index mirrors its
+field weights and is used when the server has no text search support (e.g.
+mongomock in tests and benchmarks), so ``/api/pets/search`` behaves the same
+everywhere.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+# Keep in step with the weights of the pet text index in indexes.py
+FIELD_WEIGHTS = {"name": 10, "breed": 5, "category": 5, "description": 1}
+FACET_FIELDS = ("category", "breed", "gender")
+FACET_LIMIT = 50
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def facet_counts(docs: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    facets = {}
+    for field in FACET_FIELDS:
+        counts = Counter(doc.get(field) for doc in docs)
+        facets[field] = [{"value": value, "count": count} for value, count in counts.most_common(FACET_LIMIT)]
+    return facets
+
+
+class InvertedIndex:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self.docs = docs
+        # term -> {doc position: weighted term frequency}
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for position, doc in enumerate(docs):
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(doc.get(field)):
+                    self.postings[term][position] = self.postings[term].get(position, 0.0) + weight
+
+    def search(self, query: str) -> List[Tuple[float, Dict[str, Any]]]:
+        """Documents matching any query term, best first, as ``(score, doc)``."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + len(self.docs) / len(postings))
+            for position, weighted_tf in postings.items():
+                scores[position] += weighted_tf * idf
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(round(score, 4), self.docs[position]) for position, score in ranked]
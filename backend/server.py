@@ -1,23 +1,138 @@
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, Query, Request, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, FileResponse, StreamingResponse, ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import os
 import uuid
 import base64
+import json
+import hashlib
+import re
+import logging
+import asyncio
+import math
+import csv
+import io
+import mimetypes
+import tempfile
 from enum import Enum
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import thumbnails
+from blob_store import create_blob_store, iter_upload
+from thumbnails import THUMBNAIL_WIDTHS, VARIANT_FORMATS, variant_cache, variant_key
+from user_cache import UserCache, create_shared_backend
+from password_hasher import HasherBusy, PasswordHasher
+from rate_limit import RateLimiter, create_store, parse_limit
+from read_routing import (
+    REJECTED_POINT_CODES, WriteTracker, causal_session, decode_token, encode_token, later, read_preference,
+)
+from indexes import NEWEST_FIRST, ensure_indexes
+from catalog_cache import CatalogCache
+from pet_events import PetEventBus
+from search_index import FACET_FIELDS, FACET_LIMIT, InvertedIndex, facet_counts
+import metrics
+from compression import CompressionMiddleware, choose_encoding, compress
+import stats
+from bulk_import import (
+    ManifestError, index_rows_by_image, iter_archive, iter_member, manifest_format, match_keys, next_member,
+    read_manifest,
+)
 
 # Environment variables
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'pet_adoption_db')
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '0')) or None
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '10000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '0')) or None
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '10000'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '0')) or None
+# Catalog, image, search and stats reads; orders and auth always use the primary
+CATALOG_READ_PREFERENCE = read_preference(
+    os.environ.get('MONGO_CATALOG_READ_PREFERENCE', 'secondaryPreferred'),
+    int(os.environ.get('MONGO_MAX_STALENESS_SECONDS', '90')),
+)
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', '8001'))
+WORKERS = int(os.environ.get('WEB_CONCURRENCY', '1'))
+GRACEFUL_SHUTDOWN_SECONDS = float(os.environ.get('GRACEFUL_SHUTDOWN_SECONDS', '30'))
+# Proxies (comma-separated addresses, or '*') whose X-Forwarded-For is trusted
+# for the client address. Behind an ingress this must include the ingress,
+# or every client shares its IP and per-IP rate limits become site-wide.
+FORWARDED_ALLOW_IPS = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+# So per-IP limits stay off until the trusted proxies are configured; set to 1
+# when clients connect directly
+RATE_LIMIT_PER_IP = os.environ.get(
+    'RATE_LIMIT_PER_IP', '1' if 'FORWARDED_ALLOW_IPS' in os.environ else '0'
+) == '1'
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-here')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
+DEFAULT_PAGE_SIZE = int(os.environ.get('PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '200'))
+PET_BATCH_MAX_IDS = int(os.environ.get('PET_BATCH_MAX_IDS', '100'))
+PET_EVENTS_HISTORY = int(os.environ.get('PET_EVENTS_HISTORY', '1024'))
+PET_EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('PET_EVENTS_MAX_SUBSCRIBERS', '10000'))
+PET_EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('PET_EVENTS_KEEPALIVE_SECONDS', '15'))
+PET_EVENTS_MAX_STREAM_SECONDS = float(os.environ.get('PET_EVENTS_MAX_STREAM_SECONDS', '300'))
+PET_EVENTS_RETRY_MS = int(os.environ.get('PET_EVENTS_RETRY_MS', '3000'))
+IMAGE_CACHE_MAX_AGE = int(os.environ.get('IMAGE_CACHE_MAX_AGE', str(365 * 24 * 3600)))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+USER_CACHE_SHARED_BACKEND = os.environ.get('USER_CACHE_SHARED_BACKEND', 'none')
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', '32'))
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))
+RATE_LIMITS = {
+    "login": {
+        "ip": parse_limit(os.environ.get('RATE_LIMIT_LOGIN_PER_IP', '20/60')),
+        "user": parse_limit(os.environ.get('RATE_LIMIT_LOGIN_PER_USER', '5/60')),
+    },
+    "register": {
+        "ip": parse_limit(os.environ.get('RATE_LIMIT_REGISTER_PER_IP', '5/60')),
+    },
+    "create_order": {
+        "ip": parse_limit(os.environ.get('RATE_LIMIT_ORDER_PER_IP', '30/60')),
+        "user": parse_limit(os.environ.get('RATE_LIMIT_ORDER_PER_USER', '10/60')),
+    },
+}
+CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', '512'))
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '500'))
+IMPORT_MAX_ERRORS = int(os.environ.get('IMPORT_MAX_ERRORS', '1000'))
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', '0') == '1' and orjson is not None
+STATS_COUNTERS = os.environ.get('STATS_COUNTERS', '0') == '1'
+STATS_DAYS = int(os.environ.get('STATS_DAYS', '30'))
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+# Re-encodes every Mongo reply to measure it; for profiling, not production
+METRICS_REPLY_BYTES = os.environ.get('METRICS_REPLY_BYTES', '0') == '1'
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', '0'))
+BLOB_STORE = os.environ.get('BLOB_STORE', 'local')
+BLOB_STORE_PATH = os.environ.get('BLOB_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blobs'))
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
@@ -28,15 +143,70 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Consistency-Token"],
 )
 
+# Compression middleware; skips images, event streams and precompressed bodies
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        min_size=COMPRESSION_MIN_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Metrics middleware, outermost so it times everything else
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware, slow_request_seconds=SLOW_REQUEST_SECONDS)
+
 # Database connection
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.pet_adoption_db
+# Each worker process opens its own client in startup (see connect_database);
+# a client created at import would be shared across fork() and its pool and
+# monitor threads don't survive that.
+client: Optional[AsyncIOMotorClient] = None
+db = None
+catalog_db = None
+blob_store = None
+write_tracker = WriteTracker()
+
+def use_database(database):
+    # Also used by tools and benchmarks to point the app at another database
+    global db, catalog_db, blob_store
+    db = database
+    # Same database, but reads may be served by a secondary (see read_routing)
+    catalog_db = database.client.get_database(database.name, read_preference=CATALOG_READ_PREFERENCE)
+    blob_store = create_blob_store(BLOB_STORE, db=db, root=BLOB_STORE_PATH)
+
+def connect_database():
+    global client
+    client = AsyncIOMotorClient(
+        MONGO_URL,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[write_tracker] + ([metrics.CommandRecorder(METRICS_REPLY_BYTES)] if METRICS_ENABLED else []),
+    )
+    use_database(client[DB_NAME])
+
+def close_database():
+    global client, db, catalog_db, blob_store
+    if client is not None:
+        client.close()
+        client, db, catalog_db, blob_store = None, None, None, None
+
+catalog_cache = CatalogCache(CATALOG_CACHE_SIZE)
+pet_events = PetEventBus(PET_EVENTS_HISTORY)
 
 # Security
 security = HTTPBearer()
+user_cache = UserCache(USER_CACHE_TTL, USER_CACHE_SIZE, shared=create_shared_backend(USER_CACHE_SHARED_BACKEND))
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(pwd_context, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+rate_limiter = RateLimiter(create_store(RATE_LIMIT_STORE, RATE_LIMIT_MAX_KEYS), RATE_LIMITS)
 
 # Enums
 class UserRole(str, Enum):
@@ -52,6 +222,22 @@ class Gender(str, Enum):
     MALE = "male"
     FEMALE = "female"
 
+class ImageFormat(str, Enum):
+    JPEG = "jpeg"
+    WEBP = "webp"
+
+class ExportCollection(str, Enum):
+    PETS = "pets"
+    ORDERS = "orders"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class StatsSource(str, Enum):
+    AGGREGATE = "aggregate"
+    COUNTERS = "counters"
+
 # Pydantic Models
 class UserBase(BaseModel):
     email: str
@@ -86,6 +272,55 @@ class PetResponse(PetBase):
     id: str
     created_at: datetime
 
+class PetPage(BaseModel):
+    items: List[PetResponse]
+    next_cursor: Optional[str] = None
+
+class PetBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=PET_BATCH_MAX_IDS)
+
+class PetBatchResponse(BaseModel):
+    items: List[PetResponse]
+    missing: List[str]
+
+class PetSearchResult(PetResponse):
+    score: float
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class PetSearchResponse(BaseModel):
+    items: List[PetSearchResult]
+    total: int
+    facets: Dict[str, List[FacetCount]]
+
+class PetImportRow(BaseModel):
+    name: str
+    category: str
+    weight: float
+    height: float
+    breed: str
+    gender: Gender
+    description: Optional[str] = ""
+    image: str
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportJobResponse(BaseModel):
+    id: str
+    status: str
+    total_rows: int = 0
+    processed_rows: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
 class OrderBase(BaseModel):
     pet_id: str
     shipping_name: str
@@ -104,15 +339,60 @@ class OrderResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+class OrderPage(BaseModel):
+    items: List[OrderResponse]
+    next_cursor: Optional[str] = None
+
 class OrderStatusUpdate(BaseModel):
     status: OrderStatus
 
+class BulkOrderStatusUpdate(BaseModel):
+    order_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    status: OrderStatus
+
+class BulkOrderStatusResult(BaseModel):
+    updated: List[str]
+    missing: List[str]
+    conflicts: List[str]
+
+class DailyCount(BaseModel):
+    date: str
+    count: int
+
+class AdminStats(BaseModel):
+    source: StatsSource
+    pets_total: int
+    pets_by_category: Dict[str, int]
+    pets_by_availability: Dict[str, int]
+    orders_total: int
+    orders_by_status: Dict[str, int]
+    orders_per_day: List[DailyCount]
+
 # Helper functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HasherBusy:
+        raise HTTPException(status_code=429, detail="Too many requests, try again shortly", headers={"Retry-After": "1"})
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except HasherBusy:
+        raise HTTPException(status_code=429, detail="Too many requests, try again shortly", headers={"Retry-After": "1"})
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def enforce_rate_limit(route: str, request: Request, user: Optional[str] = None):
+    # request.client is the forwarded client address when the peer is in FORWARDED_ALLOW_IPS
+    if not RATE_LIMIT_ENABLED:
+        return
+    ip = request.client.host if RATE_LIMIT_PER_IP and request.client else None
+    retry_after = await rate_limiter.check(route, ip=ip, user=user)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
 
 def create_jwt_token(data: dict) -> str:
     to_encode = data.copy()
@@ -120,6 +400,14 @@ def create_jwt_token(data: dict) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+async def load_user(user_id: str) -> Optional[Dict[str, Any]]:
+    # Cached, possibly in a shared backend; nothing downstream needs the hash
+    return await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+
+async def invalidate_user(user_id: str):
+    # Call after any change to a user's profile or role
+    await user_cache.invalidate(user_id)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
@@ -127,7 +415,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user = await db.users.find_one({"id": user_id})
+        user = await user_cache.get(user_id, load_user)
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -139,16 +427,265 @@ async def get_admin_user(current_user: dict = Depends(get_current_user)) -> Dict
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
-# Startup event to seed admin user
+# Pagination helpers
+# Listings are keyset-paginated on NEWEST_FIRST, i.e. (created_at, id) descending.
+# The cursor is an opaque token carrying the sort key of the last item on the
+# previous page.
+
+# Serialization helpers
+# With FAST_JSON_RESPONSES=1 list endpoints skip Pydantic entirely: documents are
+# projected down to the response model's fields, missing optional fields get
+# the model defaults and orjson encodes the dicts. This trusts the database to
+# hold valid data, which holds for documents written by this API.
+@lru_cache(maxsize=None)
+def model_defaults(model) -> Dict[str, Any]:
+    return {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+        if not field.is_required()
+    }
+
+def model_projection(model) -> Dict[str, int]:
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+def trusted_items(model, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    defaults = model_defaults(model)
+    return [{**defaults, **doc} for doc in docs]
+
+# Listings only load response fields, so never the image blob
+PET_LIST_PROJECTION = model_projection(PetResponse)
+ORDER_LIST_PROJECTION = model_projection(OrderResponse)
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    payload = json.dumps({"c": doc["created_at"].isoformat(), "i": doc["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = datetime.fromisoformat(payload["c"])
+        last_id = str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": last_id}},
+    ]}
+
+def range_filter(low: Optional[Any], high: Optional[Any]) -> Optional[Dict[str, Any]]:
+    bounds = {}
+    if low is not None:
+        bounds["$gte"] = low
+    if high is not None:
+        bounds["$lte"] = high
+    return bounds or None
+
+async def fetch_page(
+    collection, query: Dict[str, Any], projection: Dict[str, Any], cursor: Optional[str], limit: int, session=None
+):
+    if cursor:
+        query = {**query, **decode_cursor(cursor)}
+    # Fetch one extra document to learn whether another page exists
+    docs = await collection.find(query, projection, session=session).sort(NEWEST_FIRST).limit(limit + 1).to_list(
+        length=limit + 1
+    )
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+# HTTP caching helpers for pet images
+# Image bytes are content-addressed and never change for a given pet, so the
+# content hash doubles as a strong ETag and responses can be cached forever.
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def image_cache_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def requested_range(request: Request, etag: str, size: int) -> Optional[tuple]:
+    header = request.headers.get("range")
+    if not header:
+        return None
+    # A stale If-Range means the client's partial copy is useless; send everything
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        # Multiple or malformed ranges: ignoring the header is allowed
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        # An invalid range-spec, not an unsatisfiable one
+        return None
+    if first == "":
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+def bytes_response(request: Request, data: bytes, content_type: str, digest: Optional[str] = None) -> Response:
+    etag = f'"{digest or hashlib.sha256(data).hexdigest()}"'
+    headers = image_cache_headers(etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    byte_range = requested_range(request, etag, len(data))
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(content=data[start:end + 1], status_code=206, media_type=content_type, headers=headers)
+    return Response(content=data, media_type=content_type, headers=headers)
+
+def blob_response(request: Request, digest: str, content_type: str, size: Optional[int] = None) -> Response:
+    etag = f'"{digest}"'
+    headers = image_cache_headers(etag)
+    # Answered from the pet document alone; the blob itself is never opened
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    path = blob_store.local_path(digest)
+    if size is None and path:
+        size = os.path.getsize(path)
+    byte_range = requested_range(request, etag, size) if size is not None else None
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            blob_store.open(digest, start, end - start + 1),
+            status_code=206,
+            media_type=content_type,
+            headers=headers,
+        )
+    if path:
+        return FileResponse(path, media_type=content_type, headers=headers)
+    return StreamingResponse(blob_store.open(digest), media_type=content_type, headers=headers)
+
+# Image variants
+async def save_image_variants(pet_id: str, rendered: Dict[str, bytes]):
+    fields = {}
+    for key, data in rendered.items():
+        digest, size = await blob_store.put(data)
+        fmt = key.split("_", 1)[1]
+        fields[f"image_variants.{key}"] = {"hash": digest, "type": VARIANT_FORMATS[fmt], "size": size}
+    await db.pets.update_one({"id": pet_id}, {"$set": fields})
+
+async def store_image_variants(pet_id: str, image_hash: str):
+    try:
+        rendered = await thumbnails.generate_variants(await blob_store.read(image_hash))
+    except Exception:
+        logger.warning("Could not generate thumbnails for pet %s", pet_id, exc_info=True)
+        return
+    await save_image_variants(pet_id, rendered)
+
+async def image_variant_on_demand(pet_id: str, image_hash: str, width: int, fmt: str) -> Optional[Tuple[str, bytes]]:
+    key = variant_key(width, fmt)
+    cached = variant_cache.get(image_hash, key)
+    if cached:
+        return cached
+    try:
+        rendered = await thumbnails.generate_variants(await blob_store.read(image_hash), (width,), (fmt,))
+    except Exception:
+        logger.warning("Could not generate %s variant for pet %s", key, pet_id, exc_info=True)
+        return None
+    # Persist so other workers (and restarts) don't regenerate it
+    await save_image_variants(pet_id, rendered)
+    digest = hashlib.sha256(rendered[key]).hexdigest()
+    variant_cache.put(image_hash, key, digest, rendered[key])
+    return digest, rendered[key]
+
+# Dashboard counters
+# With STATS_COUNTERS=1 every write that changes a dashboard figure also bumps
+# its counter, so /api/admin/stats doesn't have to aggregate whole collections.
+async def record_stats(changes: stats.CounterChanges):
+    if not STATS_COUNTERS:
+        return
+    try:
+        await stats.apply_counters(db, changes)
+    except Exception:
+        # The write itself succeeded; a drifted counter is fixed by a rebuild
+        logger.exception("Could not update stat counters")
+
+# Catalog events
+# Compact deltas pushed to /api/pets/events subscribers
+def pet_event_item(pet: Dict[str, Any]) -> Dict[str, Any]:
+    return PetResponse(**pet).model_dump(mode="json")
+
+def publish_availability(pet_ids: List[str], available: bool):
+    pet_events.publish_local("availability", {"ids": pet_ids, "available": available})
+
+def publish_pets_added(pets: List[Dict[str, Any]]):
+    pet_events.publish_local("pets_added", {"items": [pet_event_item(pet) for pet in pets]})
+
+# Read routing
+# A client that has just placed an order passes the token it got back, so its
+# next catalog read sees the pet as taken even if a lagging secondary serves it
+CONSISTENCY_HEADER = "X-Consistency-Token"
+
+def consistency_point(request: Request):
+    token = request.headers.get(CONSISTENCY_HEADER)
+    if not token:
+        return None
+    try:
+        return decode_token(token)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid consistency token")
+
+@asynccontextmanager
+async def catalog_session(point, wait_for_writes: bool = False):
+    # point is the client's token; this worker's own writes, and those other
+    # workers made that the catalog watcher has seen, are trusted
+    target = later(point, write_tracker.latest, catalog_cache.change_point) if wait_for_writes else point
+    try:
+        async with causal_session(catalog_db.client, target) as session:
+            yield session
+    except OperationFailure as exc:
+        if point is not None and exc.code in REJECTED_POINT_CODES:
+            raise HTTPException(status_code=400, detail="Invalid consistency token")
+        raise
+
+# Startup event to create indexes and seed admin user
 @app.on_event("startup")
 async def startup_event():
+    if db is None:
+        connect_database()
+    await ensure_indexes(db)
+    # Keeps this worker's catalog cache coherent with writes made by other workers
+    app.state.catalog_watcher = asyncio.create_task(catalog_cache.watch(db.pets, PetResponse.model_fields))
+    app.state.pet_event_watcher = asyncio.create_task(pet_events.watch(db.pets, pet_event_item))
+    if RATE_LIMIT_ENABLED and not RATE_LIMIT_PER_IP:
+        logger.warning(
+            "Per-IP rate limits are off: set FORWARDED_ALLOW_IPS to the ingress addresses, "
+            "or RATE_LIMIT_PER_IP=1 if clients connect directly"
+        )
+    if STATS_COUNTERS and await db.stat_counters.estimated_document_count() == 0:
+        await stats.rebuild_counters(db)
+
     # Check if admin exists
     admin_exists = await db.users.find_one({"role": "admin"})
     if not admin_exists:
         admin_user = {
             "id": str(uuid.uuid4()),
             "email": "admin@petadoption.com",
-            "password": hash_password("admin123"),
+            "password": await hash_password("admin123"),
             "name": "Admin User",
             "role": "admin",
             "address": "Admin Address",
@@ -157,9 +694,23 @@ async def startup_event():
         await db.users.insert_one(admin_user)
         print("Admin user created: admin@petadoption.com / admin123")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # uvicorn has already drained in-flight requests (GRACEFUL_SHUTDOWN_SECONDS)
+    for name in ("catalog_watcher", "pet_event_watcher"):
+        watcher = getattr(app.state, name, None)
+        if watcher:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+    thumbnails.shutdown()
+    password_hasher.shutdown()
+    close_database()
+
 # Auth endpoints
 @app.post("/api/auth/register", response_model=UserResponse)
-async def register(user_data: UserCreate):
+async def register(user_data: UserCreate, request: Request):
+    await enforce_rate_limit("register", request)
+    
     # Check if user exists
     existing_user = await db.users.find_one({"email": user_data.email})
     if existing_user:
@@ -169,44 +720,250 @@ async def register(user_data: UserCreate):
     user = {
         "id": str(uuid.uuid4()),
         "email": user_data.email,
-        "password": hash_password(user_data.password),
+        "password": await hash_password(user_data.password),
         "name": user_data.name,
         "role": user_data.role,
         "address": user_data.address,
         "phone": user_data.phone
     }
     
-    await db.users.insert_one(user)
+    try:
+        await db.users.insert_one(user)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration for the same email
+        raise HTTPException(status_code=400, detail="Email already registered")
     return UserResponse(**user)
 
 @app.post("/api/auth/login")
-async def login(login_data: UserLogin):
+async def login(login_data: UserLogin, request: Request):
+    # Per-account limit slows password guessing spread across many IPs
+    await enforce_rate_limit("login", request, user=login_data.email.lower())
     user = await db.users.find_one({"email": login_data.email})
-    if not user or not verify_password(login_data.password, user["password"]):
+    if not user or not await verify_password(login_data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_jwt_token({"sub": user["id"], "role": user["role"]})
     return {"access_token": token, "token_type": "bearer", "user": UserResponse(**user)}
 
 # Pet endpoints
-@app.get("/api/pets", response_model=List[PetResponse])
-async def get_pets():
-    pets = await db.pets.find({"available": True}).to_list(length=None)
-    return [PetResponse(**pet) for pet in pets]
+def catalog_response(request: Request, cache_key: Any, body: bytes) -> Response:
+    # Compressed bodies are cached with the plain ones, so each page is
+    # compressed once per catalog version rather than on every request. A
+    # copy is only reused for the exact body it was made from, so a fresh
+    # body (read for a consistency token holder) isn't swapped for an older one.
+    encoding = None
+    if COMPRESSION_ENABLED and len(body) >= COMPRESSION_MIN_SIZE:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return Response(content=body, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+    encoded = catalog_cache.get_encoded(cache_key, body, encoding)
+    if encoded is None:
+        encoded = compress(body, encoding, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY)
+        catalog_cache.put_encoded(cache_key, body, encoding, encoded)
+    return Response(
+        content=encoded,
+        media_type="application/json",
+        headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+    )
+
+@app.get("/api/pets", response_model=PetPage)
+async def get_pets(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category: Optional[str] = None,
+    breed: Optional[str] = None,
+    gender: Optional[Gender] = None,
+    min_weight: Optional[float] = None,
+    max_weight: Optional[float] = None,
+    min_height: Optional[float] = None,
+    max_height: Optional[float] = None,
+):
+    query: Dict[str, Any] = {"available": True}
+    if category:
+        query["category"] = category
+    if breed:
+        query["breed"] = breed
+    if gender:
+        query["gender"] = gender.value
+    weight = range_filter(min_weight, max_weight)
+    if weight:
+        query["weight"] = weight
+    height = range_filter(min_height, max_height)
+    if height:
+        query["height"] = height
+
+    cache_key = (cursor, limit, category, breed, gender, min_weight, max_weight, min_height, max_height)
+    point = consistency_point(request)
+    version = catalog_cache.version
+    # Cached pages may predate a write another worker made; skip them for a token holder
+    body = None if point else catalog_cache.get(cache_key)
+    if body is None:
+        # A page outlives the read that built it, so it has to include this worker's own writes
+        async with catalog_session(point, wait_for_writes=True) as session:
+            pets, next_cursor = await fetch_page(catalog_db.pets, query, PET_LIST_PROJECTION, cursor, limit, session)
+        if FAST_JSON_RESPONSES:
+            body = orjson.dumps({"items": trusted_items(PetResponse, pets), "next_cursor": next_cursor})
+        else:
+            body = PetPage(items=[PetResponse(**pet) for pet in pets], next_cursor=next_cursor).model_dump_json().encode()
+        catalog_cache.put(cache_key, body, version)
+    return catalog_response(request, cache_key, body)
+
+@app.post("/api/pets/batch", response_model=PetBatchResponse)
+async def get_pets_batch(batch: PetBatchRequest, request: Request):
+    # Cart and favorites lookups: unavailable pets are returned too, so the
+    # client can show that they've been adopted
+    ids = list(dict.fromkeys(batch.ids))
+    async with catalog_session(consistency_point(request)) as session:
+        pets = await catalog_db.pets.find({"id": {"$in": ids}}, PET_LIST_PROJECTION, session=session).to_list(
+            length=len(ids)
+        )
+    found = {pet["id"]: pet for pet in pets}
+    if len(found) < len(ids):
+        # A pet added moments ago may not have reached the secondary yet
+        unseen = [pet_id for pet_id in ids if pet_id not in found]
+        pets = await db.pets.find({"id": {"$in": unseen}}, PET_LIST_PROJECTION).to_list(length=len(unseen))
+        found.update((pet["id"], pet) for pet in pets)
+    ordered = [found[pet_id] for pet_id in ids if pet_id in found]
+    missing = [pet_id for pet_id in ids if pet_id not in found]
+    if FAST_JSON_RESPONSES:
+        return ORJSONResponse({"items": trusted_items(PetResponse, ordered), "missing": missing})
+    return PetBatchResponse(items=[PetResponse(**pet) for pet in ordered], missing=missing)
+
+@app.get("/api/pets/events")
+async def pet_event_stream(request: Request, last_event_id: Optional[str] = None):
+    # Server-sent events; EventSource sends Last-Event-ID itself when it
+    # reconnects, the query parameter is for clients that can't set headers
+    if pet_events.subscribers >= PET_EVENTS_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many event subscribers", headers={"Retry-After": "5"})
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(
+        pet_events.stream(resume_from, PET_EVENTS_KEEPALIVE_SECONDS, PET_EVENTS_MAX_STREAM_SECONDS, PET_EVENTS_RETRY_MS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Search
+# The in-process index is only used when the server can't run $text queries,
+# and is rebuilt whenever the catalog version changes
+search_fallback: Dict[str, Any] = {"version": None, "index": None, "active": False}
+# IndexNotFound ("text index required") and CommandNotSupported; anything else,
+# a timeout or an index still building, fails only the request that hit it
+NO_TEXT_SEARCH_CODES = (27, 115)
+
+async def text_search(q: str, limit: int, session=None) -> Dict[str, Any]:
+    # Ranked results, total and every facet in a single aggregation
+    facets: Dict[str, Any] = {
+        "results": [
+            {"$sort": {"score": {"$meta": "textScore"}}},
+            {"$limit": limit},
+            {"$project": {**PET_LIST_PROJECTION, "score": {"$meta": "textScore"}}},
+        ],
+        "total": [{"$count": "count"}],
+    }
+    for field in FACET_FIELDS:
+        facets[field] = [{"$sortByCount": f"${field}"}, {"$limit": FACET_LIMIT}]
+    pipeline = [{"$match": {"$text": {"$search": q}, "available": True}}, {"$facet": facets}]
+    result = (await catalog_db.pets.aggregate(pipeline, session=session).to_list(length=1))[0]
+    return {
+        "items": result["results"],
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "facets": {
+            field: [{"value": bucket["_id"], "count": bucket["count"]} for bucket in result[field]]
+            for field in FACET_FIELDS
+        },
+    }
+
+async def fallback_search(q: str, limit: int, session=None) -> Dict[str, Any]:
+    if search_fallback["version"] != catalog_cache.version:
+        version = catalog_cache.version
+        docs = await catalog_db.pets.find({"available": True}, PET_LIST_PROJECTION, session=session).to_list(
+            length=None
+        )
+        search_fallback.update(version=version, index=InvertedIndex(docs))
+    matches = search_fallback["index"].search(q)
+    return {
+        "items": [{**doc, "score": score} for score, doc in matches[:limit]],
+        "total": len(matches),
+        "facets": facet_counts([doc for _, doc in matches]),
+    }
+
+@app.get("/api/pets/search", response_model=PetSearchResponse)
+async def search_pets(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    cache_key = ("search", q, limit)
+    point = consistency_point(request)
+    version = catalog_cache.version
+    body = None if point else catalog_cache.get(cache_key)
+    if body is None:
+        result = None
+        async with catalog_session(point, wait_for_writes=True) as session:
+            if not search_fallback["active"]:
+                try:
+                    result = await text_search(q, limit, session)
+                except (OperationFailure, NotImplementedError) as exc:
+                    if isinstance(exc, OperationFailure) and exc.code not in NO_TEXT_SEARCH_CODES:
+                        raise
+                    logger.warning("Text search unavailable, using the in-process index", exc_info=True)
+                    search_fallback["active"] = True
+            if result is None:
+                result = await fallback_search(q, limit, session)
+        body = PetSearchResponse(**result).model_dump_json().encode()
+        catalog_cache.put(cache_key, body, version)
+    return catalog_response(request, cache_key, body)
 
 @app.get("/api/pets/{pet_id}/image")
-async def get_pet_image(pet_id: str):
-    pet = await db.pets.find_one({"id": pet_id})
-    if not pet or "image_data" not in pet:
+async def get_pet_image(
+    pet_id: str,
+    request: Request,
+    size: Optional[int] = None,
+    image_format: ImageFormat = Query(ImageFormat.JPEG, alias="format"),
+):
+    if size is not None and size not in THUMBNAIL_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"size must be one of {list(THUMBNAIL_WIDTHS)}")
+    
+    # image_data only exists on pets not yet moved by tools.migrate_images
+    projection = {"_id": 0, "image_hash": 1, "image_size": 1, "image_type": 1, "image_variants": 1, "image_data": 1}
+    pet = await catalog_db.pets.find_one({"id": pet_id}, projection)
+    if not pet:
+        # A pet added moments ago may not have reached the secondary yet
+        pet = await db.pets.find_one({"id": pet_id}, projection)
+    if not pet or not (pet.get("image_hash") or pet.get("image_data")):
         raise HTTPException(status_code=404, detail="Pet image not found")
     
-    image_data = base64.b64decode(pet["image_data"])
     content_type = pet.get("image_type", "image/jpeg")
+    if not pet.get("image_hash"):
+        return bytes_response(request, base64.b64decode(pet["image_data"]), content_type)
     
-    return Response(content=image_data, media_type=content_type)
+    if size is not None and thumbnails.enabled():
+        variant = pet.get("image_variants", {}).get(variant_key(size, image_format.value))
+        if variant:
+            return blob_response(request, variant["hash"], variant["type"], variant.get("size"))
+        generated = await image_variant_on_demand(pet_id, pet["image_hash"], size, image_format.value)
+        if generated:
+            digest, data = generated
+            return bytes_response(request, data, VARIANT_FORMATS[image_format.value], digest)
+    
+    # Fall back to the original upload
+    return blob_response(request, pet["image_hash"], content_type, pet.get("image_size"))
+
+def new_pet_document(fields: Dict[str, Any], image_hash: str, image_size: int, image_type: str) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        **fields,
+        "available": True,
+        "image_hash": image_hash,
+        "image_size": image_size,
+        "image_type": image_type,
+        "created_at": datetime.utcnow()
+    }
 
 @app.post("/api/pets", response_model=PetResponse)
 async def add_pet(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     category: str = Form(...),
     weight: float = Form(...),
@@ -217,40 +974,239 @@ async def add_pet(
     image: UploadFile = File(...),
     current_user: dict = Depends(get_admin_user)
 ):
-    # Read and encode image
-    image_content = await image.read()
-    image_data = base64.b64encode(image_content).decode('utf-8')
+    # Stream the upload into the blob store; identical photos are stored once
+    image_hash, image_size = await blob_store.put_stream(iter_upload(image))
     
-    pet = {
-        "id": str(uuid.uuid4()),
-        "name": name,
-        "category": category,
-        "weight": weight,
-        "height": height,
-        "breed": breed,
-        "gender": gender,
-        "description": description,
-        "available": True,
-        "image_data": image_data,
-        "image_type": image.content_type,
-        "created_at": datetime.utcnow()
-    }
+    pet = new_pet_document(
+        {
+            "name": name,
+            "category": category,
+            "weight": weight,
+            "height": height,
+            "breed": breed,
+            "gender": gender,
+            "description": description,
+        },
+        image_hash,
+        image_size,
+        image.content_type,
+    )
     
     await db.pets.insert_one(pet)
+    catalog_cache.invalidate()
+    publish_pets_added([pet])
+    await record_stats(stats.pets_added([category]))
+    if thumbnails.enabled():
+        background_tasks.add_task(store_image_variants, pet["id"], image_hash)
     return PetResponse(**pet)
 
 @app.get("/api/admin/pets", response_model=List[PetResponse])
 async def get_all_pets_admin(current_user: dict = Depends(get_admin_user)):
-    pets = await db.pets.find().to_list(length=None)
+    pets = await db.pets.find({}, PET_LIST_PROJECTION).to_list(length=None)
+    if FAST_JSON_RESPONSES:
+        return ORJSONResponse(trusted_items(PetResponse, pets))
     return [PetResponse(**pet) for pet in pets]
 
+# Bulk import
+async def spool_upload(upload: UploadFile) -> str:
+    # Copy the upload to a file we own; the request's own temp files are closed
+    # once the response is sent, before the import job runs
+    fd, path = tempfile.mkstemp(prefix="pet-import-")
+    with os.fdopen(fd, "wb") as spool:
+        async for chunk in iter_upload(upload):
+            await asyncio.to_thread(spool.write, chunk)
+    return path
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors())
+
+async def run_import_job(job_id: str, manifest_path: str, fmt: str, images_path: str):
+    progress = {"total_rows": 0, "processed_rows": 0, "inserted": 0, "failed": 0}
+    errors: List[Dict[str, Any]] = []
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    
+    def record_error(row_number: int, message: str):
+        progress["failed"] += 1
+        progress["processed_rows"] += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"row": row_number, "error": message})
+    
+    async def save_progress(**fields):
+        await db.import_jobs.update_one({"id": job_id}, {"$set": {**progress, "errors": errors, **fields}})
+    
+    async def flush():
+        if not batch:
+            return
+        docs = [doc for _, doc in batch]
+        failed_rows = {}
+        try:
+            await db.pets.insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            failed_rows = {err["index"]: err["errmsg"] for err in exc.details["writeErrors"]}
+        for index, (row_number, _) in enumerate(batch):
+            if index in failed_rows:
+                record_error(row_number, failed_rows[index])
+            else:
+                progress["inserted"] += 1
+                progress["processed_rows"] += 1
+        inserted_docs = [doc for index, doc in enumerate(docs) if index not in failed_rows]
+        await record_stats(stats.pets_added(doc["category"] for doc in inserted_docs))
+        if inserted_docs:
+            # Per batch, so clients refetching on the event see the new pets
+            catalog_cache.invalidate()
+            publish_pets_added(inserted_docs)
+        batch.clear()
+        await save_progress()
+    
+    try:
+        await save_progress(status="running")
+        rows: Dict[int, Dict[str, Any]] = {}
+        for row_number, row in read_manifest(manifest_path, fmt):
+            progress["total_rows"] += 1
+            if isinstance(row, ManifestError):
+                record_error(row_number, str(row))
+                continue
+            try:
+                rows[row_number] = PetImportRow(**row).model_dump(mode="json")
+            except ValidationError as exc:
+                record_error(row_number, validation_message(exc))
+        await save_progress()
+        
+        # One forward pass over the archive; each image is stored once and
+        # shared by every manifest row that references it
+        rows_by_image = index_rows_by_image(rows)
+        members = iter_archive(images_path)
+        while rows_by_image and (member := await next_member(members)) is not None:
+            name, fileobj = member
+            key = next((key for key in match_keys(name) if key in rows_by_image), None)
+            if key is None:
+                continue
+            image_hash, image_size = await blob_store.put_stream(iter_member(fileobj))
+            image_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            for row_number in rows_by_image.pop(key):
+                fields = rows.pop(row_number)
+                fields.pop("image")
+                batch.append((row_number, new_pet_document(fields, image_hash, image_size, image_type)))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+        await flush()
+        
+        for image, row_numbers in rows_by_image.items():
+            for row_number in row_numbers:
+                record_error(row_number, f"Image not found in archive: {image}")
+        await save_progress(status="completed", finished_at=datetime.utcnow())
+    except ManifestError as exc:
+        await save_progress(status="failed", error=str(exc), finished_at=datetime.utcnow())
+    except Exception as exc:
+        logger.exception("Bulk import %s failed", job_id)
+        # A batch that failed mid-insert may still have added some pets
+        catalog_cache.invalidate()
+        await save_progress(status="failed", error=str(exc), finished_at=datetime.utcnow())
+    finally:
+        os.remove(manifest_path)
+        os.remove(images_path)
+
+@app.post("/api/admin/pets/bulk", response_model=ImportJobResponse, status_code=202)
+async def bulk_import_pets(
+    background_tasks: BackgroundTasks,
+    manifest: UploadFile = File(...),
+    images: UploadFile = File(...),
+    current_user: dict = Depends(get_admin_user)
+):
+    try:
+        fmt = manifest_format(manifest.filename, manifest.content_type)
+    except ManifestError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    
+    manifest_path = await spool_upload(manifest)
+    images_path = await spool_upload(images)
+    job = {
+        "id": str(uuid.uuid4()),
+        "status": "queued",
+        "created_by": current_user["id"],
+        "created_at": datetime.utcnow(),
+    }
+    # Jobs live in Mongo so any worker can answer progress polls
+    await db.import_jobs.insert_one(job)
+    background_tasks.add_task(run_import_job, job["id"], manifest_path, fmt, images_path)
+    return ImportJobResponse(**job)
+
+@app.get("/api/admin/pets/bulk/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(job_id: str, current_user: dict = Depends(get_admin_user)):
+    job = await db.import_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return ImportJobResponse(**job)
+
+# Export endpoints
+EXPORT_MODELS = {ExportCollection.PETS: PetResponse, ExportCollection.ORDERS: OrderResponse}
+
+def export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+async def export_rows(collection: ExportCollection, export_format: ExportFormat):
+    # Rows are encoded and flushed one batch at a time, so memory stays flat
+    # no matter how large the collection is
+    model = EXPORT_MODELS[collection]
+    fields = list(model.model_fields)
+    defaults = model_defaults(model)
+    cursor = db[collection.value].find({}, model_projection(model), batch_size=EXPORT_BATCH_SIZE)
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == ExportFormat.CSV:
+        writer.writerow(fields)
+    rows = 0
+    async for doc in cursor:
+        doc = {**defaults, **doc}
+        if export_format == ExportFormat.CSV:
+            writer.writerow([export_value(doc.get(field)) for field in fields])
+        else:
+            buffer.write(json.dumps({field: export_value(doc.get(field)) for field in fields}))
+            buffer.write("\n")
+        rows += 1
+        if rows % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@app.get("/api/admin/export/{collection}")
+async def export_collection(
+    collection: ExportCollection,
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    current_user: dict = Depends(get_admin_user)
+):
+    media_type = "text/csv" if export_format == ExportFormat.CSV else "application/x-ndjson"
+    filename = f"{collection.value}-{datetime.utcnow():%Y%m%d%H%M%S}.{export_format.value}"
+    return StreamingResponse(
+        export_rows(collection, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 # Order endpoints
 @app.post("/api/orders", response_model=OrderResponse)
-async def create_order(order_data: OrderBase, current_user: dict = Depends(get_current_user)):
-    # Check if pet exists and is available
-    pet = await db.pets.find_one({"id": order_data.pet_id, "available": True})
+async def create_order(
+    order_data: OrderBase, request: Request, response: Response, current_user: dict = Depends(get_current_user)
+):
+    await enforce_rate_limit("create_order", request, user=current_user["id"])
+    
+    # Reserve the pet in one conditional update so concurrent requests can't both get it
+    pet = await db.pets.find_one_and_update(
+        {"id": order_data.pet_id, "available": True},
+        {"$set": {"available": False}},
+        projection={"_id": 0, "name": 1},
+    )
     if not pet:
         raise HTTPException(status_code=404, detail="Pet not found or not available")
+    catalog_cache.invalidate()
+    publish_availability([order_data.pet_id], False)
     
     # Create order
     order = {
@@ -262,24 +1218,148 @@ async def create_order(order_data: OrderBase, current_user: dict = Depends(get_c
         "shipping_address": order_data.shipping_address,
         "shipping_phone": order_data.shipping_phone,
         "status": OrderStatus.PENDING,
+        "active_pet_id": order_data.pet_id,
         "created_at": datetime.utcnow()
     }
     
-    await db.orders.insert_one(order)
-    
-    # Mark pet as unavailable
-    await db.pets.update_one({"id": order_data.pet_id}, {"$set": {"available": False}})
+    try:
+        await db.orders.insert_one(order)
+    except DuplicateKeyError:
+        # Another active order already holds this pet, so it stays unavailable
+        raise HTTPException(status_code=409, detail="Pet already has an active adoption order")
+    except Exception:
+        await db.pets.update_one({"id": order_data.pet_id}, {"$set": {"available": True}})
+        catalog_cache.invalidate()
+        publish_availability([order_data.pet_id], True)
+        raise
     
+    await record_stats(stats.combine(stats.pets_reserved(), stats.order_created(order["created_at"])))
+    # Covers the reservation and the order; send it back on catalog reads to see both
+    if write_tracker.latest is not None:
+        response.headers[CONSISTENCY_HEADER] = encode_token(write_tracker.latest)
     return OrderResponse(**order)
 
-@app.get("/api/orders", response_model=List[OrderResponse])
-async def get_orders(current_user: dict = Depends(get_current_user)):
-    if current_user["role"] == "admin":
-        orders = await db.orders.find().to_list(length=None)
+@app.get("/api/orders", response_model=OrderPage)
+async def get_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[OrderStatus] = None,
+    pet_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    # Admins see every order, users only their own
+    query: Dict[str, Any] = {}
+    if current_user["role"] != "admin":
+        query["user_id"] = current_user["id"]
+    if status:
+        query["status"] = status.value
+    if pet_id:
+        query["pet_id"] = pet_id
+    created = range_filter(created_from, created_to)
+    if created:
+        query["created_at"] = created
+    
+    orders, next_cursor = await fetch_page(db.orders, query, ORDER_LIST_PROJECTION, cursor, limit)
+    if FAST_JSON_RESPONSES:
+        return ORJSONResponse({"items": trusted_items(OrderResponse, orders), "next_cursor": next_cursor})
+    return OrderPage(items=[OrderResponse(**order) for order in orders], next_cursor=next_cursor)
+
+# Rejected orders release their pet; every other status keeps it reserved
+ACTIVE_ORDER = {"status": {"$ne": OrderStatus.REJECTED}}
+
+def status_change(status: OrderStatus) -> Dict[str, Any]:
+    update: Dict[str, Any] = {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+    if status == OrderStatus.REJECTED:
+        update["$unset"] = {"active_pet_id": ""}
+    return update
+
+async def reactivate_order(order_id: str, status: OrderStatus) -> Dict[str, Any]:
+    # Moving a rejected order back to pending/approved has to win the pet again
+    order = await db.orders.find_one({"id": order_id}, {"_id": 0, "pet_id": 1, "status": 1})
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    pet = await db.pets.find_one_and_update(
+        {"id": order["pet_id"], "available": True},
+        {"$set": {"available": False}},
+        projection={"_id": 1},
+    )
+    if not pet:
+        raise HTTPException(status_code=409, detail="Pet is no longer available")
+    catalog_cache.invalidate()
+    publish_availability([order["pet_id"]], False)
+    update = status_change(status)
+    update["$set"]["active_pet_id"] = order["pet_id"]
+    try:
+        reactivated = await db.orders.find_one_and_update(
+            {"id": order_id}, update, projection={"_id": 0}, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        await db.pets.update_one({"id": order["pet_id"]}, {"$set": {"available": True}})
+        catalog_cache.invalidate()
+        publish_availability([order["pet_id"]], True)
+        raise HTTPException(status_code=409, detail="Pet already has an active adoption order")
+    await record_stats(stats.combine(stats.pets_reserved(), stats.order_status_changed(order["status"], status.value)))
+    return reactivated
+
+@app.put("/api/orders/status", response_model=BulkOrderStatusResult)
+async def update_order_statuses(
+    bulk_update: BulkOrderStatusUpdate,
+    current_user: dict = Depends(get_admin_user)
+):
+    order_ids = list(dict.fromkeys(bulk_update.order_ids))
+    orders = await db.orders.find(
+        {"id": {"$in": order_ids}}, {"_id": 0, "id": 1, "pet_id": 1, "status": 1}
+    ).to_list(length=len(order_ids))
+    found = {order["id"]: order for order in orders}
+    
+    pending, updated, conflicts, released_pets = [], [], [], []
+    for order_id, order in found.items():
+        if order["status"] == OrderStatus.REJECTED and bulk_update.status != OrderStatus.REJECTED:
+            # Reactivation must re-reserve the pet; use the single-order endpoint
+            conflicts.append(order_id)
+            continue
+        pending.append(order)
+    
+    # Filter on the status we saw, and only act on updates that matched: an
+    # order changed concurrently may have freed its pet for someone else
+    # already. The marker tells us afterwards which updates matched.
+    batch_id = str(uuid.uuid4())
+    update = status_change(bulk_update.status)
+    update["$set"]["status_batch"] = batch_id
+    if pending:
+        await db.orders.bulk_write(
+            [UpdateOne({"id": order["id"], "status": order["status"]}, update) for order in pending], ordered=False
+        )
+        matched = await db.orders.find(
+            {"id": {"$in": [order["id"] for order in pending]}, "status_batch": batch_id}, {"_id": 0, "id": 1}
+        ).to_list(length=len(pending))
     else:
-        orders = await db.orders.find({"user_id": current_user["id"]}).to_list(length=None)
+        matched = []
+    matched_ids = {order["id"] for order in matched}
+    counter_changes: stats.CounterChanges = {}
+    for order in pending:
+        if order["id"] not in matched_ids:
+            conflicts.append(order["id"])
+            continue
+        updated.append(order["id"])
+        counter_changes = stats.combine(counter_changes, stats.order_status_changed(order["status"], bulk_update.status.value))
+        if order["status"] != OrderStatus.REJECTED and bulk_update.status == OrderStatus.REJECTED:
+            released_pets.append(order["pet_id"])
+    
+    if released_pets:
+        await db.pets.update_many({"id": {"$in": released_pets}}, {"$set": {"available": True}})
+        catalog_cache.invalidate()
+        publish_availability(released_pets, True)
+        counter_changes = stats.combine(counter_changes, stats.pets_released(len(released_pets)))
+    await record_stats(counter_changes)
     
-    return [OrderResponse(**order) for order in orders]
+    return BulkOrderStatusResult(
+        updated=updated,
+        missing=[order_id for order_id in order_ids if order_id not in found],
+        conflicts=conflicts,
+    )
 
 @app.put("/api/orders/{order_id}/status", response_model=OrderResponse)
 async def update_order_status(
@@ -287,22 +1367,65 @@ async def update_order_status(
     status_update: OrderStatusUpdate, 
     current_user: dict = Depends(get_admin_user)
 ):
-    # Update order status
-    result = await db.orders.update_one(
-        {"id": order_id},
-        {"$set": {"status": status_update.status, "updated_at": datetime.utcnow()}}
+    # The pre-image tells us whether the pet was reserved; the post-image is
+    # derived locally instead of re-reading the order
+    update = status_change(status_update.status)
+    query = {"id": order_id}
+    if status_update.status != OrderStatus.REJECTED:
+        query.update(ACTIVE_ORDER)
+    previous = await db.orders.find_one_and_update(
+        query, update, projection={"_id": 0}, return_document=ReturnDocument.BEFORE
     )
-    
-    if result.matched_count == 0:
+    if previous is None:
+        if status_update.status != OrderStatus.REJECTED:
+            # Missing, or rejected and now being reinstated
+            return OrderResponse(**await reactivate_order(order_id, status_update.status))
         raise HTTPException(status_code=404, detail="Order not found")
     
-    # If rejected, make pet available again
-    if status_update.status == OrderStatus.REJECTED:
-        order = await db.orders.find_one({"id": order_id})
-        await db.pets.update_one({"id": order["pet_id"]}, {"$set": {"available": True}})
+    # If newly rejected, make pet available again
+    if status_update.status == OrderStatus.REJECTED and previous["status"] != OrderStatus.REJECTED:
+        await db.pets.update_one({"id": previous["pet_id"]}, {"$set": {"available": True}})
+        catalog_cache.invalidate()
+        publish_availability([previous["pet_id"]], True)
+        await record_stats(stats.pets_released())
+    await record_stats(stats.order_status_changed(previous["status"], status_update.status.value))
     
-    updated_order = await db.orders.find_one({"id": order_id})
-    return OrderResponse(**updated_order)
+    order = {**previous, **update["$set"]}
+    order.pop("active_pet_id", None)
+    return OrderResponse(**order)
+
+@app.get("/api/admin/cache/stats")
+async def get_cache_stats(current_user: dict = Depends(get_admin_user)):
+    return {"users": user_cache.stats(), "catalog": catalog_cache.stats(), "rate_limit_rejections": rate_limiter.stats()}
+
+@app.get("/api/admin/stats", response_model=AdminStats)
+async def get_admin_stats(
+    source: Optional[StatsSource] = None,
+    days: int = Query(STATS_DAYS, ge=1, le=366),
+    current_user: dict = Depends(get_admin_user),
+):
+    # Counters are only trustworthy when every worker maintains them
+    if source is None:
+        source = StatsSource.COUNTERS if STATS_COUNTERS else StatsSource.AGGREGATE
+    if source == StatsSource.COUNTERS and not STATS_COUNTERS:
+        raise HTTPException(status_code=400, detail="Stat counters are disabled")
+    since = stats.stats_since(days)
+    if source == StatsSource.COUNTERS:
+        return AdminStats(**await stats.counter_stats(catalog_db, since))
+    return AdminStats(**await stats.aggregate_stats(catalog_db, since))
+
+@app.post("/api/admin/stats/rebuild", response_model=AdminStats)
+async def rebuild_admin_stats(current_user: dict = Depends(get_admin_user)):
+    if not STATS_COUNTERS:
+        raise HTTPException(status_code=400, detail="Stat counters are disabled")
+    await stats.rebuild_counters(db)
+    return AdminStats(**await stats.counter_stats(db, stats.stats_since(STATS_DAYS)))
+
+@app.get("/metrics")
+async def get_metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/api/user/profile", response_model=UserResponse)
 async def get_user_profile(current_user: dict = Depends(get_current_user)):
@@ -310,4 +1433,13 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # An import string lets uvicorn start WEB_CONCURRENCY worker processes
+    uvicorn.run(
+        "server:app",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+    )
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""Admin dashboard statistics.
+
+``aggregate_stats`` computes everything from the collections with one ``$facet``
+aggregation per collection. With ``STATS_COUNTERS=1`` the write handlers also
+maintain small counter documents (``db.stat_counters``, one per metric/key), so
+``counter_stats`` answers in time proportional to the number of categories and
+days rather than the number of pets and orders. ``rebuild_counters`` resyncs
+the counters from the aggregation, e.g. after enabling them on existing data.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+CounterChanges = Dict[Tuple[str, str], int]
+
+AVAILABILITY = {True: "available", False: "unavailable"}
+
+
+def day_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+def stats_since(days: int) -> datetime:
+    """Midnight (UTC) at the start of a window covering today and the ``days - 1`` before it."""
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+
+
+def combine(*changes: CounterChanges) -> CounterChanges:
+    # Counter's + operator drops negative results, which are the point here
+    total: CounterChanges = {}
+    for change in changes:
+        for key, delta in change.items():
+            total[key] = total.get(key, 0) + delta
+    return total
+
+
+def pets_added(categories) -> CounterChanges:
+    changes: CounterChanges = {}
+    for category in categories:
+        changes = combine(changes, {("pets_by_category", category): 1, ("pets_by_availability", "available"): 1})
+    return changes
+
+
+def pets_reserved(count: int = 1) -> CounterChanges:
+    return {("pets_by_availability", "available"): -count, ("pets_by_availability", "unavailable"): count}
+
+
+def pets_released(count: int = 1) -> CounterChanges:
+    return {("pets_by_availability", "available"): count, ("pets_by_availability", "unavailable"): -count}
+
+
+def order_created(created_at: datetime) -> CounterChanges:
+    return {("orders_by_status", "pending"): 1, ("orders_per_day", day_key(created_at)): 1}
+
+
+def order_status_changed(old: str, new: str) -> CounterChanges:
+    if old == new:
+        return {}
+    return {("orders_by_status", old): -1, ("orders_by_status", new): 1}
+
+
+async def apply_counters(db, changes: CounterChanges):
+    updates = [
+        UpdateOne({"metric": metric, "key": key}, {"$inc": {"count": delta}}, upsert=True)
+        for (metric, key), delta in changes.items()
+        if delta
+    ]
+    if updates:
+        await db.stat_counters.bulk_write(updates, ordered=False)
+
+
+def empty_stats(source: str) -> Dict[str, Any]:
+    return {
+        "source": source,
+        "pets_total": 0,
+        "pets_by_category": {},
+        "pets_by_availability": {"available": 0, "unavailable": 0},
+        "orders_total": 0,
+        "orders_by_status": {},
+        "orders_per_day": [],
+    }
+
+
+async def aggregate_stats(db, since: Optional[datetime]) -> Dict[str, Any]:
+    count = {"$sum": 1}
+    pets_pipeline = [{"$facet": {
+        "by_category": [{"$group": {"_id": "$category", "count": count}}],
+        "by_availability": [{"$group": {"_id": "$available", "count": count}}],
+    }}]
+    per_day = [] if since is None else [{"$match": {"created_at": {"$gte": since}}}]
+    per_day += [
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": count}},
+        {"$sort": {"_id": 1}},
+    ]
+    orders_pipeline = [{"$facet": {
+        "by_status": [{"$group": {"_id": "$status", "count": count}}],
+        "per_day": per_day,
+    }}]
+    # $facet can't span collections, but the two pipelines can run concurrently
+    (pets,), (orders,) = await asyncio.gather(
+        db.pets.aggregate(pets_pipeline).to_list(length=1),
+        db.orders.aggregate(orders_pipeline).to_list(length=1),
+    )
+
+    stats = empty_stats("aggregate")
+    stats["pets_by_category"] = {bucket["_id"]: bucket["count"] for bucket in pets["by_category"]}
+    for bucket in pets["by_availability"]:
+        stats["pets_by_availability"][AVAILABILITY[bool(bucket["_id"])]] += bucket["count"]
+    stats["orders_by_status"] = {bucket["_id"]: bucket["count"] for bucket in orders["by_status"]}
+    stats["orders_per_day"] = [{"date": bucket["_id"], "count": bucket["count"]} for bucket in orders["per_day"]]
+    stats["pets_total"] = sum(stats["pets_by_category"].values())
+    stats["orders_total"] = sum(stats["orders_by_status"].values())
+    return stats
+
+
+async def counter_stats(db, since: Optional[datetime]) -> Dict[str, Any]:
+    stats = empty_stats("counters")
+    per_day = {}
+    async for counter in db.stat_counters.find({}, {"_id": 0}):
+        metric, key, value = counter["metric"], counter["key"], counter["count"]
+        if metric == "orders_per_day":
+            if value and (since is None or key >= day_key(since)):
+                per_day[key] = value
+        elif value:
+            stats[metric][key] = value
+    stats["orders_per_day"] = [{"date": day, "count": per_day[day]} for day in sorted(per_day)]
+    stats["pets_total"] = sum(stats["pets_by_category"].values())
+    stats["orders_total"] = sum(stats["orders_by_status"].values())
+    return stats
+
+
+async def rebuild_counters(db):
+    # Writes that land while this runs can be lost; run it when traffic is quiet.
+    # Upserts rather than delete + insert, so two workers rebuilding at startup
+    # (or a rebuild racing the $inc upserts) can't trip the unique index.
+    stats = await aggregate_stats(db, since=None)
+    counts = {
+        (metric, key): value
+        for metric in ("pets_by_category", "pets_by_availability", "orders_by_status")
+        for key, value in stats[metric].items()
+    }
+    counts.update((("orders_per_day", day["date"]), day["count"]) for day in stats["orders_per_day"])
+    if counts:
+        await db.stat_counters.bulk_write([
+            UpdateOne({"metric": metric, "key": key}, {"$set": {"count": value}}, upsert=True)
+            for (metric, key), value in counts.items()
+        ], ordered=False)
+    # Keys nothing counts any more, e.g. a category whose last pet is gone
+    stale = {"$nor": [{"metric": metric, "key": key} for metric, key in counts]} if counts else {}
+    await db.stat_counters.delete_many(stale)
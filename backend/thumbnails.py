@@ -0,0 +1,101 @@
+"""Resized variants of pet images for browse grids.
+
+Resizing is CPU-bound, so it runs in a small process pool rather than on the
+event loop. Pillow is optional: without it ``enabled()`` is false and callers
+fall back to serving the original upload.
+"""
+import asyncio
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+THUMBNAIL_WIDTHS = (160, 320, 640)
+VARIANT_FORMATS = {"jpeg": "image/jpeg", "webp": "image/webp"}
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', '2'))
+THUMBNAIL_QUALITY = int(os.environ.get('THUMBNAIL_QUALITY', '80'))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def enabled() -> bool:
+    return Image is not None
+
+
+def variant_key(width: int, fmt: str) -> str:
+    # Used as a Mongo sub-document key, so it must not contain dots
+    return f"{width}_{fmt}"
+
+
+def render_variants(data: bytes, widths: Iterable[int], formats: Iterable[str]) -> Dict[str, bytes]:
+    """Decode ``data`` once and encode it at every width/format pair."""
+    rendered = {}
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        for width in widths:
+            # Never upscale; small uploads are simply re-encoded
+            if width < image.width:
+                height = max(1, round(image.height * width / image.width))
+                scaled = image.resize((width, height), Image.LANCZOS)
+            else:
+                scaled = image
+            for fmt in formats:
+                out = io.BytesIO()
+                if fmt == "jpeg":
+                    scaled.convert("RGB").save(out, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+                else:
+                    scaled.save(out, "WEBP", quality=THUMBNAIL_QUALITY)
+                rendered[variant_key(width, fmt)] = out.getvalue()
+    return rendered
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+    return _pool
+
+
+async def generate_variants(
+    data: bytes,
+    widths: Iterable[int] = THUMBNAIL_WIDTHS,
+    formats: Iterable[str] = tuple(VARIANT_FORMATS),
+) -> Dict[str, bytes]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), render_variants, data, tuple(widths), tuple(formats))
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class VariantCache:
+    """LRU of variants generated on demand, keyed by (image hash, variant key)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, bytes]]" = OrderedDict()
+
+    def get(self, image_hash: str, key: str) -> Optional[Tuple[str, bytes]]:
+        entry = self._entries.get((image_hash, key))
+        if entry is not None:
+            self._entries.move_to_end((image_hash, key))
+        return entry
+
+    def put(self, image_hash: str, key: str, digest: str, data: bytes):
+        self._entries[(image_hash, key)] = (digest, data)
+        self._entries.move_to_end((image_hash, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+variant_cache = VariantCache(int(os.environ.get('THUMBNAIL_CACHE_SIZE', '256')))
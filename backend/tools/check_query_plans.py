@@ -0,0 +1,61 @@
+"""Fail if any query the handlers issue would scan a whole collection.
+
+Explains every entry of ``indexes.QUERY_SHAPES`` against a live mongod, after
+applying the index registry, and exits non-zero if a winning plan contains a
+COLLSCAN stage. Run from the backend directory:
+
+    python -m tools.check_query_plans [--mongo-url mongodb://localhost:27017] [--db-name pet_adoption_db]
+"""
+import argparse
+import asyncio
+import sys
+from typing import Any, Iterator
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indexes import QUERY_SHAPES, ensure_indexes
+from server import DB_NAME, MONGO_URL
+
+
+def plan_stages(plan: Any) -> Iterator[str]:
+    # Classic and slot-based engine plans nest stages under different keys
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+async def check(mongo_url: str, db_name: str) -> int:
+    db = AsyncIOMotorClient(mongo_url)[db_name]
+    await ensure_indexes(db)
+    failures = 0
+    for shape in QUERY_SHAPES:
+        cursor = db[shape.collection].find(shape.filter)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        explain = await cursor.limit(50).explain()
+        stages = list(plan_stages(explain["queryPlanner"]["winningPlan"]))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        failures += status != "ok"
+        print(f"{status:>8}  {shape.collection}.{shape.name}: {' <- '.join(stages)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default=MONGO_URL)
+    parser.add_argument("--db-name", default=DB_NAME)
+    args = parser.parse_args()
+
+    failures = asyncio.run(check(args.mongo_url, args.db_name))
+    if failures:
+        print(f"{failures} queries fall back to a collection scan")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
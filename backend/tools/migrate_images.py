@@ -0,0 +1,57 @@
+"""Move base64 ``image_data`` out of ``db.pets`` into the blob store.
+
+Run from the backend directory with the same environment as the server:
+
+    python -m tools.migrate_images [--batch-size 100] [--dry-run]
+
+Safe to re-run: only pets that still carry ``image_data`` are touched, and each
+pet is updated only after its image has been written to the blob store.
+"""
+import argparse
+import asyncio
+import base64
+
+import server
+
+
+async def migrate(batch_size: int, dry_run: bool) -> int:
+    server.connect_database()
+    try:
+        return await migrate_pets(server.db, server.blob_store, batch_size, dry_run)
+    finally:
+        server.close_database()
+
+
+async def migrate_pets(db, blob_store, batch_size: int, dry_run: bool) -> int:
+    migrated = 0
+    cursor = db.pets.find(
+        {"image_data": {"$exists": True}},
+        {"_id": 0, "id": 1, "image_data": 1},
+        batch_size=batch_size,
+    )
+    async for pet in cursor:
+        data = base64.b64decode(pet["image_data"])
+        if dry_run:
+            print(f"would migrate {pet['id']} ({len(data)} bytes)")
+        else:
+            image_hash, image_size = await blob_store.put(data)
+            await db.pets.update_one(
+                {"id": pet["id"]},
+                {"$set": {"image_hash": image_hash, "image_size": image_size}, "$unset": {"image_data": ""}},
+            )
+        migrated += 1
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    migrated = asyncio.run(migrate(args.batch_size, args.dry_run))
+    print(f"{'Found' if args.dry_run else 'Migrated'} {migrated} pet images")
+
+
+if __name__ == "__main__":
+    main()
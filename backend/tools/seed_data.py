@@ -0,0 +1,255 @@
+"""Seed a deterministic, production-sized dataset for performance work.
+
+Run from the backend directory with the same environment as the server::
+
+    python -m tools.seed_data --users 1000 --pets 100000 --orders 20000
+    python -m tools.seed_data --pets 1000000 --image-sizes 16,64,256 --drop
+
+Every document is derived from ``--seed`` and its position, so two runs with
+the same arguments produce identical ids, names and timestamps. Documents are
+written with batched ``insert_many``; re-running without ``--drop`` skips what
+already exists, so an interrupted seed can simply be restarted. ``--drop`` only
+deletes seeded documents; real users, pets and orders are kept.
+
+Pet images are synthetic noise PNGs. ``--images`` distinct images are stored
+once in the blob store and shared between pets, cycling through
+``--image-sizes`` (KiB). Seeded users all share ``--password``.
+"""
+import argparse
+import asyncio
+import random
+import struct
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+
+from pymongo.errors import BulkWriteError
+
+import stats
+from indexes import ensure_indexes
+import server
+from server import STATS_COUNTERS, pwd_context
+
+CATEGORIES = {
+    "Dog": ["Labrador", "Beagle", "Poodle", "Bulldog", "Husky", "Dachshund", "Boxer", "Collie"],
+    "Cat": ["Siamese", "Persian", "Maine Coon", "Bengal", "Ragdoll", "Sphynx"],
+    "Bird": ["Parakeet", "Cockatiel", "Canary", "Lovebird"],
+    "Rabbit": ["Lop", "Rex", "Angora"],
+}
+# Roughly how often each category shows up in a shelter
+CATEGORY_WEIGHTS = [50, 35, 10, 5]
+NAMES = [
+    "Max", "Bella", "Charlie", "Luna", "Cooper", "Daisy", "Milo", "Lucy", "Rocky", "Coco",
+    "Buddy", "Molly", "Oliver", "Nala", "Teddy", "Ruby", "Leo", "Rosie", "Bear", "Zoe",
+]
+DEFAULT_STATUS_MIX = "pending=0.15,approved=0.6,rejected=0.25"
+NAMESPACE = uuid.UUID("0f6c1d2e-7a4b-4c8e-9d3f-5b2a1e0c9f87")
+# Marks seeded pets and orders, so --drop leaves everything else alone
+SEED_TAG = "seeded"
+
+
+def parse_status_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        status, _, weight = part.partition("=")
+        if status not in ("pending", "approved", "rejected"):
+            raise argparse.ArgumentTypeError(f"unknown order status {status!r}")
+        mix[status] = float(weight)
+    return mix
+
+
+def stable_id(seed: int, kind: str, index: int) -> str:
+    return str(uuid.uuid5(NAMESPACE, f"{seed}:{kind}:{index}"))
+
+
+def synthetic_png(rng: random.Random, size: int) -> bytes:
+    """An RGB noise PNG of roughly ``size`` bytes (noise doesn't compress)."""
+    side = max(1, int((size / 3) ** 0.5))
+    rows = b"".join(b"\x00" + rng.randbytes(side * 3) for _ in range(side))
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    header = struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 1)) + chunk(b"IEND", b"")
+
+
+class Dataset:
+    """Derives each document from the seed and its index alone."""
+
+    def __init__(self, args, images: List[Tuple[str, int]]):
+        self.seed = args.seed
+        self.epoch = args.epoch
+        self.span = timedelta(days=args.days)
+        self.images = images
+        self.password_hash = pwd_context.hash(args.password)
+        self.user_count = args.users
+        self.pet_count = args.pets
+        self.status_mix = args.status_mix
+
+    def rng(self, kind: str, index: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{index}")
+
+    def user(self, index: int) -> Dict[str, Any]:
+        return {
+            "id": stable_id(self.seed, "user", index),
+            "email": f"seed-user-{index}@example.com",
+            "password": self.password_hash,
+            "name": f"Seed User {index}",
+            "role": "user",
+            "address": f"{index} Seed Street",
+            "phone": f"+1555{index:07d}",
+        }
+
+    def pet(self, index: int) -> Dict[str, Any]:
+        rng = self.rng("pet", index)
+        category = rng.choices(list(CATEGORIES), CATEGORY_WEIGHTS)[0]
+        image_hash, image_size = self.images[index % len(self.images)]
+        return {
+            "id": stable_id(self.seed, "pet", index),
+            SEED_TAG: True,
+            "name": f"{rng.choice(NAMES)} {index}",
+            "category": category,
+            "weight": round(rng.uniform(0.5, 45.0), 1),
+            "height": round(rng.uniform(10.0, 90.0), 1),
+            "breed": rng.choice(CATEGORIES[category]),
+            "gender": rng.choice(["male", "female"]),
+            "description": f"Friendly {category.lower()} looking for a home",
+            "available": True,
+            "image_hash": image_hash,
+            "image_size": image_size,
+            "image_type": "image/png",
+            "created_at": self.epoch + self.span * rng.random(),
+        }
+
+    def orders(self, count: int) -> Iterator[Tuple[Dict[str, Any], bool]]:
+        """Yield ``(order, reserves_pet)``; each pet gets at most one active order."""
+        plan = random.Random(f"{self.seed}:orders")
+        free_pets = list(range(self.pet_count))
+        plan.shuffle(free_pets)
+        statuses, weights = list(self.status_mix), list(self.status_mix.values())
+        for index in range(count):
+            rng = self.rng("order", index)
+            status = rng.choices(statuses, weights)[0]
+            if status != "rejected" and free_pets:
+                pet_index = free_pets.pop()
+            else:
+                # Rejected orders may share a pet; so must everything once pets run out
+                status = "rejected"
+                pet_index = rng.randrange(self.pet_count)
+            pet = self.pet(pet_index)
+            created_at = pet["created_at"] + timedelta(hours=rng.uniform(1, 24 * 30))
+            order = {
+                "id": stable_id(self.seed, "order", index),
+                SEED_TAG: True,
+                "user_id": stable_id(self.seed, "user", rng.randrange(self.user_count)),
+                "pet_id": pet["id"],
+                "pet_name": pet["name"],
+                "shipping_name": f"Seed User {index}",
+                "shipping_address": f"{index} Seed Street",
+                "shipping_phone": f"+1555{index:07d}",
+                "status": status,
+                "created_at": created_at,
+            }
+            if status != "pending":
+                order["updated_at"] = created_at + timedelta(hours=rng.uniform(1, 72))
+            if status != "rejected":
+                order["active_pet_id"] = pet["id"]
+            yield order, status != "rejected"
+
+
+async def insert_batches(collection, docs: Iterator[Dict[str, Any]], batch_size: int) -> Tuple[int, int]:
+    inserted = skipped = 0
+    batch: List[Dict[str, Any]] = []
+
+    async def flush():
+        nonlocal inserted, skipped
+        try:
+            result = await collection.insert_many(batch, ordered=False)
+            inserted += len(result.inserted_ids)
+        except BulkWriteError as exc:
+            duplicates = sum(1 for err in exc.details["writeErrors"] if err["code"] == 11000)
+            if duplicates != len(exc.details["writeErrors"]):
+                raise
+            inserted += exc.details["nInserted"]
+            skipped += duplicates
+        batch.clear()
+        print(f"  {collection.name}: {inserted + skipped}", end="\r", flush=True)
+
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    print(f"  {collection.name}: {inserted} inserted, {skipped} already present")
+    return inserted, skipped
+
+
+async def seed(db, blob_store, args):
+    if args.drop:
+        await db.users.delete_many({"email": {"$regex": "^seed-user-"}})
+        for collection in ("pets", "orders"):
+            await db[collection].delete_many({SEED_TAG: True})
+    await ensure_indexes(db)
+
+    image_rng = random.Random(f"{args.seed}:images")
+    images = []
+    for index in range(max(1, args.images)):
+        size_kb = args.image_sizes[index % len(args.image_sizes)]
+        images.append(await blob_store.put(synthetic_png(image_rng, size_kb * 1024)))
+    print(f"stored {len(images)} images")
+
+    dataset = Dataset(args, images)
+    await insert_batches(db.users, (dataset.user(i) for i in range(args.users)), args.batch_size)
+
+    # Orders decide which pets end up reserved. They are cheap to regenerate, so
+    # plan them once for the reserved set and again to write them
+    order_count = args.orders if args.pets and args.users else 0
+    reserved = {order["pet_id"] for order, reserves_pet in dataset.orders(order_count) if reserves_pet}
+
+    def pets():
+        for index in range(args.pets):
+            pet = dataset.pet(index)
+            pet["available"] = pet["id"] not in reserved
+            yield pet
+
+    await insert_batches(db.pets, pets(), args.batch_size)
+    await insert_batches(db.orders, (order for order, _ in dataset.orders(order_count)), args.batch_size)
+    if STATS_COUNTERS:
+        await stats.rebuild_counters(db)
+    print(f"seeded users share the password {args.password!r}")
+
+
+async def run(args):
+    server.connect_database()
+    try:
+        await seed(server.db, server.blob_store, args)
+    finally:
+        server.close_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--pets", type=int, default=10000)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--status-mix", type=parse_status_mix, default=parse_status_mix(DEFAULT_STATUS_MIX))
+    parser.add_argument("--images", type=int, default=50, help="distinct images shared between pets")
+    parser.add_argument(
+        "--image-sizes", type=lambda text: [int(size) for size in text.split(",")], default=[32, 128, 512],
+        help="image sizes in KiB, cycled through (default 32,128,512)",
+    )
+    parser.add_argument("--epoch", type=datetime.fromisoformat, default=datetime(2024, 1, 1), help="earliest created_at")
+    parser.add_argument("--days", type=int, default=365, help="spread of created_at after --epoch")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--password", default="seed-password")
+    parser.add_argument("--drop", action="store_true", help="delete previously seeded users, pets and orders first")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
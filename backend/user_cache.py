@@ -0,0 +1,118 @@
+"""Cache of authenticated users for ``get_current_user``.
+
+Every authenticated request needs the caller's user document. Keeping recently
+seen users in a small TTL+LRU map avoids a Mongo round-trip per request. An
+optional shared backend sits behind the local map so several workers can share
+lookups; ``InMemorySharedCache`` is a stand-in with the same interface a Redis
+or memcached client would implement.
+
+Anything that changes a user's profile or role must call ``invalidate`` so the
+change is visible before the TTL expires.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SharedCacheBackend:
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+
+class InMemorySharedCache(SharedCacheBackend):
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class UserCache:
+    def __init__(self, ttl: float, max_entries: int, shared: Optional[SharedCacheBackend] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(
+        self,
+        user_id: str,
+        loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at >= time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return dict(user)
+            del self._entries[user_id]
+
+        user = await self.shared.get(user_id) if self.shared else None
+        if user is not None:
+            self.shared_hits += 1
+        else:
+            self.misses += 1
+            user = await loader(user_id)
+            # Unknown users are not cached, so a freshly registered account works immediately
+            if user is None:
+                return None
+            if self.shared:
+                await self.shared.set(user_id, user, self.ttl)
+
+        self._store(user_id, user)
+        return dict(user)
+
+    def _store(self, user_id: str, user: Dict[str, Any]):
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+        if self.shared:
+            await self.shared.delete(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+def create_shared_backend(name: str) -> Optional[SharedCacheBackend]:
+    if name in ("", "none"):
+        return None
+    if name == "memory":
+        return InMemorySharedCache()
+    raise ValueError(f"Unknown shared cache backend: {name}")
@@ -0,0 +1,24 @@
+from bulk_import import ManifestError, read_manifest
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_csv_row_with_too_many_fields_is_a_row_error(tmp_path):
+    path = write(tmp_path, "pets.csv", "name,description\nRex,good dog\nMax,big, friendly\nBella,calm\n")
+    rows = list(read_manifest(path, "csv"))
+    assert [row_number for row_number, _ in rows] == [1, 2, 3]
+    assert rows[0][1] == {"name": "Rex", "description": "good dog"}
+    assert isinstance(rows[1][1], ManifestError) and str(rows[1][1]) == "Too many fields"
+    assert rows[2][1] == {"name": "Bella", "description": "calm"}
+
+
+def test_ndjson_bad_lines_are_row_errors(tmp_path):
+    path = write(tmp_path, "pets.ndjson", '{"name": "Rex"}\n\nnot json\n[1, 2]\n')
+    rows = list(read_manifest(path, "ndjson"))
+    assert rows[0] == (1, {"name": "Rex"})
+    assert [row_number for row_number, _ in rows[1:]] == [3, 4]
+    assert all(isinstance(row, ManifestError) for _, row in rows[1:])
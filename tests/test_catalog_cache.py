@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from bson import Timestamp
+
+from catalog_cache import CatalogCache
+from read_routing import ConsistencyPoint
+
+
+class FakeStream:
+    """Yields the given change events, then ends the watch loop."""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.changes:
+            raise asyncio.CancelledError
+        return self.changes.pop(0)
+
+
+class FakeCollection:
+    def __init__(self, changes):
+        self.changes = changes
+
+    def watch(self, pipeline):
+        return FakeStream(self.changes)
+
+
+def test_put_is_dropped_after_an_invalidation():
+    cache = CatalogCache(10)
+    version = cache.version
+    cache.invalidate()
+    cache.put("page", b"stale", version)
+    assert cache.get("page") is None
+    cache.put("page", b"fresh", cache.version)
+    assert cache.get("page") == b"fresh"
+
+
+def test_watch_invalidates_and_remembers_the_newest_change():
+    cache = CatalogCache(10)
+    cache.put("page", b"body", cache.version)
+    changes = [
+        {"operationType": "insert", "clusterTime": Timestamp(100, 1)},
+        {"operationType": "update", "clusterTime": Timestamp(100, 2)},
+    ]
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cache.watch(FakeCollection(changes), ["name"]))
+    assert cache.get("page") is None
+    # Once on connecting, then once per change
+    assert cache.invalidations == 3
+    assert cache.change_point == ConsistencyPoint(Timestamp(100, 2), None)
+
+
+def test_compressed_copies_share_the_page_entry():
+    cache = CatalogCache(1)
+    body = b"page"
+    cache.put("a", body, cache.version)
+    assert cache.get_encoded("a", body, "gzip") is None
+    cache.put_encoded("a", body, "gzip", b"gz")
+    assert cache.get_encoded("a", body, "gzip") == b"gz"
+    # Not for a different body, e.g. one read fresh for a consistency token
+    assert cache.get_encoded("a", bytes(bytearray(body)), "gzip") is None
+    cache.put("b", b"other", cache.version)
+    assert cache.get_encoded("a", body, "gzip") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (0, 0)
+    assert (stats["compressed_hits"], stats["compressed_misses"]) == (1, 3)
@@ -0,0 +1,76 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from server import etag_matches, requested_range
+
+ETAG = '"abc123"'
+
+
+def request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    (ETAG, True),
+    (f"W/{ETAG}", True),
+    (f'"other", W/{ETAG}', True),
+    ('"other"', False),
+    ("abc123", False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+@pytest.mark.parametrize("header, size, expected", [
+    ("bytes=0-9", 100, (0, 9)),
+    ("bytes=90-", 100, (90, 99)),
+    ("bytes=90-200", 100, (90, 99)),
+    ("bytes=-10", 100, (90, 99)),
+    ("bytes=-500", 100, (0, 99)),
+    ("bytes=0-0", 1, (0, 0)),
+])
+def test_requested_range(header, size, expected):
+    assert requested_range(request(range=header), ETAG, size) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=0-1,5-6",
+    "bytes=-",
+    "bytes=a-b",
+    "items=0-9",
+    "bytes=9-3",
+])
+def test_unsupported_or_invalid_range_is_ignored(header):
+    assert requested_range(request(range=header), ETAG, 100) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=100-", 100),
+    ("bytes=-0", 100),
+    ("bytes=0-", 0),
+    ("bytes=-5", 0),
+])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(HTTPException) as exc:
+        requested_range(request(range=header), ETAG, size)
+    assert exc.value.status_code == 416
+    assert exc.value.headers["Content-Range"] == f"bytes */{size}"
+
+
+def test_no_range_header():
+    assert requested_range(request(), ETAG, 100) is None
+
+
+def test_if_range_needs_a_strong_match():
+    assert requested_range(request(range="bytes=0-9", if_range=ETAG), ETAG, 100) == (0, 9)
+    assert requested_range(request(range="bytes=0-9", if_range='"stale"'), ETAG, 100) is None
+    assert requested_range(request(range="bytes=0-9", if_range=f"W/{ETAG}"), ETAG, 100) is None
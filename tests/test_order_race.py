@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from indexes import ensure_indexes
+
+RACERS = 20
+
+
+@pytest.fixture
+def database(monkeypatch):
+    for name in ("db", "catalog_db", "blob_store"):
+        monkeypatch.setattr(server, name, getattr(server, name))
+    monkeypatch.setattr(server, "RATE_LIMIT_ENABLED", False)
+    server.use_database(AsyncMongoMockClient()["pet_adoption_test"])
+    return server.db
+
+
+async def seed(db):
+    await ensure_indexes(db)
+    pet_id = str(uuid.uuid4())
+    await db.pets.insert_one({
+        "id": pet_id, "name": "Solo", "category": "Dog", "weight": 10.0, "height": 40.0, "breed": "Beagle",
+        "gender": "male", "description": "Only one of him", "available": True, "created_at": datetime.utcnow(),
+    })
+    headers = []
+    for i in range(RACERS):
+        user_id = str(uuid.uuid4())
+        await db.users.insert_one({
+            "id": user_id, "email": f"racer{i}@example.com", "password": "", "name": f"Racer {i}",
+            "role": "user", "address": "", "phone": "",
+        })
+        headers.append({"Authorization": f"Bearer {server.create_jwt_token({'sub': user_id, 'role': 'user'})}"})
+    return pet_id, headers
+
+
+async def race(db):
+    pet_id, headers = await seed(db)
+    order = {"pet_id": pet_id, "shipping_name": "x", "shipping_address": "x", "shipping_phone": "x"}
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.post("/api/orders", json=order, headers=h) for h in headers))
+    return pet_id, responses
+
+
+def test_concurrent_orders_for_one_pet(database):
+    pet_id, responses = asyncio.run(race(database))
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(200) == 1
+    # Losers either find the pet taken or trip the one-active-order index
+    assert set(statuses) - {200} <= {404, 409}
+    stored = asyncio.run(database.orders.count_documents({"pet_id": pet_id}))
+    assert stored == 1
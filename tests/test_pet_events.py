@@ -0,0 +1,93 @@
+import asyncio
+
+from pet_events import PetEventBus
+
+
+def published(bus: PetEventBus, count: int):
+    for i in range(count):
+        bus.publish("availability", {"ids": [f"pet{i}"], "available": False})
+
+
+def event_ids(chunks):
+    lines = [line for chunk in chunks for line in chunk.decode().splitlines()]
+    return [line[len("id: "):] for line in lines if line.startswith("id: ")]
+
+
+def test_resume_point_without_last_event_id_starts_at_the_head():
+    bus = PetEventBus(history=5)
+    published(bus, 3)
+    assert bus.resume_point(None) == 3
+    assert bus.resume_point("") == 3
+
+
+def test_resume_point_within_the_buffer():
+    bus = PetEventBus(history=5)
+    published(bus, 8)
+    # Events 4..8 are buffered; resuming after 3 replays all of them
+    assert bus.resume_point(bus.event_id(3)) == 3
+    assert bus.resume_point(bus.event_id(8)) == 8
+
+
+def test_resume_point_rejects_unknown_ids():
+    bus = PetEventBus(history=5)
+    published(bus, 8)
+    assert bus.resume_point(bus.event_id(2)) is None  # evicted
+    assert bus.resume_point(bus.event_id(9)) is None  # from the future
+    assert bus.resume_point("otherworker-5") is None
+    assert bus.resume_point(f"{bus.epoch}-x") is None
+    assert bus.resume_point("garbage") is None
+
+
+def test_resume_point_on_an_empty_bus():
+    bus = PetEventBus(history=5)
+    assert bus.resume_point(bus.event_id(0)) == 0
+    assert bus.resume_point(bus.event_id(1)) is None
+
+
+def test_since_returns_only_newer_events_in_order():
+    bus = PetEventBus(history=5)
+    published(bus, 8)
+    assert event_ids(bus.since(5)) == [bus.event_id(6), bus.event_id(7), bus.event_id(8)]
+    assert bus.since(8) == []
+    assert event_ids(bus.since(3)) == [bus.event_id(n) for n in range(4, 9)]
+
+
+async def collect(bus: PetEventBus, last_event_id):
+    stream = bus.stream(last_event_id, keepalive_seconds=10, max_seconds=0.05, retry_ms=1000)
+    return [chunk async for chunk in stream]
+
+
+def test_stream_replays_from_last_event_id():
+    bus = PetEventBus(history=5)
+    published(bus, 4)
+    chunks = asyncio.run(collect(bus, bus.event_id(2)))
+    assert chunks[0] == b"retry: 1000\n\n"
+    assert event_ids(chunks[1:]) == [bus.event_id(3), bus.event_id(4)]
+    assert bus.subscribers == 0
+
+
+def test_stream_resets_clients_it_cannot_resume():
+    for last_event_id in ("EPOCH-1", "otherworker-3"):
+        # A fresh bus per loop: its asyncio.Event binds to the first loop that waits on it
+        bus = PetEventBus(history=2)
+        published(bus, 5)
+        chunks = asyncio.run(collect(bus, last_event_id.replace("EPOCH", bus.epoch)))
+        assert b"event: reset" in chunks[1]
+        # The reset carries the head, so the next reconnect resumes normally
+        assert event_ids(chunks[1:]) == [bus.event_id(5)]
+
+
+def test_stream_delivers_events_published_while_connected():
+    bus = PetEventBus(history=5)
+
+    async def scenario():
+        stream = bus.stream(None, keepalive_seconds=10, max_seconds=1, retry_ms=1000)
+        assert await stream.__anext__() == b"retry: 1000\n\n"
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        published(bus, 2)
+        chunk = await pending
+        await stream.aclose()
+        return chunk
+
+    assert event_ids([asyncio.run(scenario())]) == [bus.event_id(1), bus.event_id(2)]
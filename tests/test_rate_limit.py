@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import rate_limit
+import server
+from rate_limit import InMemoryRateLimitStore, RateLimit, RateLimiter, RateLimitStore, parse_limit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def take(store, key, limit):
+    return asyncio.run(store.take([(key, limit)]))[0]
+
+
+def test_parse_limit():
+    assert parse_limit("10/60") == RateLimit(10, 10 / 60)
+    assert parse_limit(" 5 ") == RateLimit(5, 5)
+    assert parse_limit("") is None
+    assert parse_limit("0") is None
+    for spec in ("x/60", "10/0", "-1/60"):
+        with pytest.raises(ValueError):
+            parse_limit(spec)
+
+
+def test_bucket_allows_a_burst_then_reports_the_wait(clock):
+    store = InMemoryRateLimitStore(10)
+    limit = parse_limit("3/60")
+    assert [take(store, "k", limit) for _ in range(3)] == [0, 0, 0]
+    assert take(store, "k", limit) == pytest.approx(20)
+    clock[0] += 5
+    # A rejected request doesn't consume anything, it just waits less
+    assert take(store, "k", limit) == pytest.approx(15)
+
+
+def test_bucket_refills_up_to_the_burst(clock):
+    store = InMemoryRateLimitStore(10)
+    limit = parse_limit("2/10")
+    take(store, "k", limit), take(store, "k", limit)
+    clock[0] += 5
+    assert take(store, "k", limit) == 0
+    assert take(store, "k", limit) > 0
+    clock[0] += 3600
+    assert [take(store, "k", limit) for _ in range(2)] == [0, 0]
+    assert take(store, "k", limit) > 0
+
+
+def test_keys_have_separate_buckets(clock):
+    store = InMemoryRateLimitStore(10)
+    limit = parse_limit("1/60")
+    assert take(store, "a", limit) == 0
+    assert take(store, "a", limit) > 0
+    assert take(store, "b", limit) == 0
+
+
+def test_store_evicts_least_recently_used(clock):
+    store = InMemoryRateLimitStore(2)
+    limit = parse_limit("1/60")
+    take(store, "a", limit)
+    take(store, "b", limit)
+    take(store, "a", limit)
+    take(store, "c", limit)
+    assert len(store) == 2 and store.evictions == 1
+    # "b" was forgotten, so it starts with a full bucket again
+    assert take(store, "b", limit) == 0
+    assert take(store, "c", limit) > 0
+
+
+def test_limiter_checks_every_scope_and_counts_rejections(clock):
+    limits = {"login": {"ip": parse_limit("10/60"), "user": parse_limit("1/60")}}
+    limiter = RateLimiter(InMemoryRateLimitStore(10), limits)
+    assert asyncio.run(limiter.check("login", ip="1.2.3.4", user="a@x")) == 0
+    assert asyncio.run(limiter.check("login", ip="1.2.3.4", user="a@x")) > 0
+    assert asyncio.run(limiter.check("login", ip="1.2.3.4", user="b@x")) == 0
+    # Unknown routes and missing values aren't limited
+    assert asyncio.run(limiter.check("other", ip="1.2.3.4")) == 0
+    assert asyncio.run(limiter.check("login", ip=None, user=None)) == 0
+    assert limiter.stats() == {"login:user": 1}
+
+
+def test_rejected_request_takes_no_tokens(clock):
+    store = InMemoryRateLimitStore(10)
+    ip, user = parse_limit("2/60"), parse_limit("1/60")
+    assert asyncio.run(store.take([("ip", ip), ("user", user)])) == [0, 0]
+    waits = asyncio.run(store.take([("ip", ip), ("user", user)]))
+    assert waits[0] == 0 and waits[1] == pytest.approx(60)
+    # The IP bucket still has the token the rejected request didn't use
+    assert take(store, "ip", ip) == 0
+
+
+def test_limiter_rejection_leaves_other_scopes_alone(clock):
+    limits = {"login": {"ip": parse_limit("2/60"), "user": parse_limit("1/60")}}
+    limiter = RateLimiter(InMemoryRateLimitStore(10), limits)
+    assert asyncio.run(limiter.check("login", ip="1.2.3.4", user="a@x")) == 0
+    for _ in range(3):
+        assert asyncio.run(limiter.check("login", ip="1.2.3.4", user="a@x")) > 0
+    assert asyncio.run(limiter.check("login", ip="1.2.3.4", user="b@x")) == 0
+    assert limiter.stats() == {"login:user": 3}
+
+
+def test_limiter_fails_open():
+    class Broken(RateLimitStore):
+        async def take(self, buckets):
+            raise ConnectionError("store down")
+
+    limiter = RateLimiter(Broken(), {"login": {"ip": parse_limit("1/60")}})
+    assert asyncio.run(limiter.check("login", ip="1.2.3.4")) == 0
+
+
+def test_enforce_rate_limit_sets_retry_after(clock, monkeypatch):
+    limiter = RateLimiter(InMemoryRateLimitStore(10), {"register": {"ip": parse_limit("1/90")}})
+    monkeypatch.setattr(server, "rate_limiter", limiter)
+    monkeypatch.setattr(server, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(server, "RATE_LIMIT_PER_IP", True)
+    request = Request({"type": "http", "method": "POST", "path": "/", "headers": [], "client": ("10.0.0.1", 1234)})
+    asyncio.run(server.enforce_rate_limit("register", request))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(server.enforce_rate_limit("register", request))
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "90"
+    clock[0] += 89.5
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(server.enforce_rate_limit("register", request))
+    # Rounded up, never 0
+    assert exc.value.headers["Retry-After"] == "1"
+
+
+def test_per_ip_limits_need_opting_in(clock, monkeypatch):
+    limiter = RateLimiter(InMemoryRateLimitStore(10), {"register": {"ip": parse_limit("1/90")}})
+    monkeypatch.setattr(server, "rate_limiter", limiter)
+    monkeypatch.setattr(server, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(server, "RATE_LIMIT_PER_IP", False)
+    request = Request({"type": "http", "method": "POST", "path": "/", "headers": [], "client": ("10.0.0.1", 1234)})
+    for _ in range(3):
+        asyncio.run(server.enforce_rate_limit("register", request))